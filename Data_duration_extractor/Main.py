@@ -28,16 +28,14 @@ class ResumeAnalyzer:
       print(f"Duration found: {duration_result}")
 
       print("\nExtracting skills...")
-      found_skills_set = self.skill_extractor.extract_skills(
-         text=text_content,
-         output_path=str(self.output_file)
-      )
+      found_skills_set = self.skill_extractor.extract_skills(text=text_content)
       found_skills_list = list(found_skills_set)
       print(f"Skills found: {found_skills_list}")
 
       years = duration_result.get('years', 0)
       months = duration_result.get('months', 0)
 
+      self.output_file.parent.mkdir(parents=True, exist_ok=True)
       with open(self.output_file, mode='w', newline='', encoding='utf-8') as file:
          writer = csv.writer(file)
          writer.writerow(["Skill", "Years", "Months"])
@@ -1,14 +1,113 @@
+import atexit
 import fitz
 import io
+import os
 import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
 from PIL import Image
 from .Tesseract_searcher import init_tesseract
 import pytesseract
 from RFC_logging_system.LoggerFactory import get_logger
 
+
+def _ocr_document_page(page: fitz.Page) -> str:
+    """OCR одной страницы уже открытого документа."""
+    # Конвертируем страницу в изображение 300 DPI; RGB-буфер пиксмапа отдаём в PIL
+    # напрямую, без кодирования в PNG и обратного декодирования
+    pix = page.get_pixmap(matrix=fitz.Matrix(300 / 72, 300 / 72), alpha=False)
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    # OCR
+    page_text = pytesseract.image_to_string(image, lang='eng', config='--psm 6')
+    return page_text.strip() if page_text else ""
+
+
+def _init_ocr_worker(tesseract_cmd: str | None):
+    """Инициализация процесса пула: путь к tesseract в spawn-процессы не наследуется."""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    # Параллелим процессами; внутренние потоки tesseract (OpenMP) только переподписывают ядра
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _ocr_pages(pdf_bytes: bytes, page_numbers: range) -> list[str]:
+    """
+    OCR группы страниц. Функция уровня модуля — выполняется в процессе пула:
+    PDF передаётся и открывается один раз на группу, а не на каждую страницу.
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [_ocr_document_page(doc[page_no]) for page_no in page_numbers]
+
+
+# Пул OCR общий на процесс и создаётся при первом скане: запуск воркеров (на Windows —
+# spawn с повторным импортом __main__) дорогой, платить за него на каждый PDF незачем
+OCR_WORKERS = os.cpu_count() or 1
+_ocr_pool: ProcessPoolExecutor | None = None
+_ocr_pool_lock = Lock()
+
+
+def _get_ocr_pool(tesseract_cmd: str | None) -> ProcessPoolExecutor:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                initializer=_init_ocr_worker,
+                initargs=(tesseract_cmd,)
+            )
+        return _ocr_pool
+
+
+def _reset_ocr_pool(broken: ProcessPoolExecutor):
+    """Сбрасывает сломанный пул (упал воркер, например по OOM) — следующий вызов создаст новый."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        # Другой поток мог уже пересоздать пул
+        if _ocr_pool is broken:
+            _ocr_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_ocr_pool():
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown()
+
+
+def _ocr_in_pool(pdf_bytes: bytes, page_count: int, tesseract_cmd: str | None) -> list[str]:
+    """
+    OCR документа в общем пуле: страницы делятся на непрерывные группы — по одной на воркер.
+    Если пул сломан, он пересоздаётся и попытка повторяется один раз.
+    """
+    n_chunks = min(OCR_WORKERS, page_count)
+    chunks = [
+        range(i * page_count // n_chunks, (i + 1) * page_count // n_chunks)
+        for i in range(n_chunks)
+    ]
+    for attempt in range(2):
+        pool = _get_ocr_pool(tesseract_cmd)
+        try:
+            futures = [pool.submit(_ocr_pages, pdf_bytes, chunk) for chunk in chunks]
+            return [page_text for future in futures for page_text in future.result()]
+        except BrokenProcessPool:
+            _reset_ocr_pool(pool)
+            if attempt:
+                raise
+
+
 class PDFToTextConverter:
     """Конвертер PDF в текст с поддержкой OCR."""
 
+    # Проверка текстового слоя: сколько первых страниц смотреть
+    # и сколько символов нужно, чтобы считать PDF не сканом
+    TEXT_PROBE_PAGES = 3
+    TEXT_PROBE_MIN_CHARS = 20
+
+    # Сколько первых страниц проверять на таблицы
+    TABLE_PROBE_PAGES = 3
+
     def __init__(self):
         # Looking for tessearc on PC
         self.logger = get_logger("PDFConverter")
@@ -18,27 +117,55 @@ class PDFToTextConverter:
         """
         Конвертирует PDF в текст.
         """
-        # Попытка 1: pdfplumber
-        self.logger.info("Attempting to extract text with pdfplumber")
-        text = self._extract_with_pdfplumber(pdf_bytes)
-        if text:
-            self.logger.info("Successfully extracted text with pdfplumber")
-            return text
-        else:
-            self.logger.info("Failed to extract text with pdfplumber, trying fallback method")
+        # Документ PyMuPDF открывается один раз и переиспользуется проверкой,
+        # извлечением текста и OCR; pdfplumber (pdfminer) открывает свой
+        try:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except Exception as e:
+            self.logger.error(f"Error opening PDF with PyMuPDF: {e}")
+            doc = None
 
-        # Попытка 2: PyMuPDF
-        if use_fallback:
-            text = self._extract_with_pymupdf(pdf_bytes)
-            if text:
+        try:
+            return self._convert(doc, pdf_bytes, use_fallback, use_ocr)
+        finally:
+            if doc is not None:
+                doc.close()
+
+    def _convert(self, doc: fitz.Document | None, pdf_bytes: bytes, use_fallback: bool, use_ocr: bool) -> str | None:
+        """Цепочка попыток извлечения (см. convert). doc — None, если PyMuPDF не смог открыть файл."""
+        # Скан без текстового слоя — парсеры ничего не найдут, сразу идём в OCR
+        has_text = doc is None or self._has_text_layer(doc)
+        if not has_text and use_ocr and self.OCR_AVAILABLE:
+            self.logger.info("No text layer found, skipping text parsers")
+        else:
+            # Попытка 1: PyMuPDF (C-движок, самый быстрый)
+            self.logger.info("Attempting to extract text with PyMuPDF")
+            text = self._extract_with_pymupdf(doc) if doc is not None else None
+            if text and not (use_fallback and self._looks_tabular(doc)):
                 self.logger.info("Successfully extracted text with PyMuPDF")
                 return text
+            elif text:
+                self.logger.info("Document looks table-rich, trying pdfplumber")
             else:
-                self.logger.info("Failed to extract text with PyMuPDF, trying OCR")
+                self.logger.info("Failed to extract text with PyMuPDF, trying fallback method")
+
+            # Попытка 2: pdfplumber (pdfminer на чистом Python — медленнее),
+            # только если PyMuPDF ничего не нашёл или в документе таблицы
+            if use_fallback:
+                pymupdf_text = text
+                text = self._extract_with_pdfplumber(pdf_bytes)
+                if text:
+                    self.logger.info("Successfully extracted text with pdfplumber")
+                    return text
+                elif pymupdf_text:
+                    self.logger.info("Failed to extract text with pdfplumber, using PyMuPDF result")
+                    return pymupdf_text
+                else:
+                    self.logger.info("Failed to extract text with pdfplumber, trying OCR")
 
         # Попытка 3: OCR
-        if use_ocr:
-            text = self._extract_with_ocr(pdf_bytes)
+        if use_ocr and doc is not None:
+            text = self._extract_with_ocr(doc, pdf_bytes)
             if text:
                 self.logger.info("Successfully extracted text with OCR")
                 return text
@@ -47,6 +174,32 @@ class PDFToTextConverter:
 
         return None
 
+    def _has_text_layer(self, doc: fitz.Document) -> bool:
+        """Быстрая проверка через PyMuPDF: есть ли текст на первых страницах."""
+        try:
+            sample_pages = min(doc.page_count, self.TEXT_PROBE_PAGES)
+            chars = sum(len(doc[i].get_text().strip()) for i in range(sample_pages))
+            return chars >= self.TEXT_PROBE_MIN_CHARS
+
+        except Exception as e:
+            # Не смогли проверить — пусть решают парсеры
+            self.logger.warning(f"Text layer probe failed: {e}")
+            return True
+
+    def _looks_tabular(self, doc: fitz.Document) -> bool:
+        """
+        Есть ли таблицы на первых страницах (их лучше разбирает pdfplumber).
+        Смотрим разметку страницы, а не текст: get_text() отдаёт ячейки по одной на строку.
+        """
+        try:
+            sample_pages = min(doc.page_count, self.TABLE_PROBE_PAGES)
+            return any(doc[i].find_tables().tables for i in range(sample_pages))
+
+        except Exception as e:
+            # Старый PyMuPDF без find_tables или битая страница — остаёмся на PyMuPDF
+            self.logger.warning(f"Table probe failed: {e}")
+            return False
+
     def _extract_with_pdfplumber(self, pdf_bytes: bytes) -> str | None:
         """Извлечение текста через pdfplumber."""
         try:
@@ -71,12 +224,9 @@ class PDFToTextConverter:
             self.logger.error(f"Error extracting text with pdfplumber: {e}")
             return None
 
-    def _extract_with_pymupdf(self, pdf_bytes: bytes) -> str | None:
-        """Извлечение текста через PyMuPDF (fitz)."""
+    def _extract_with_pymupdf(self, doc: fitz.Document) -> str | None:
+        """Извлечение текста через PyMuPDF (fitz) из уже открытого документа."""
         try:
-            pdf_file = io.BytesIO(pdf_bytes)
-            doc = fitz.open(stream=pdf_file, filetype="pdf")
-
             pages_text = []
 
             for page in doc:
@@ -84,7 +234,6 @@ class PDFToTextConverter:
                 if page_text and page_text.strip():
                     pages_text.append(page_text)
 
-            doc.close()
             result = "\n".join(pages_text) if pages_text else None
             if result:
                 self.logger.info(f"Successfully extracted text from {len(pages_text)} pages using PyMuPDF")
@@ -96,29 +245,26 @@ class PDFToTextConverter:
             self.logger.error(f"Error extracting text with PyMuPDF: {e}")
             return None
 
-    def _extract_with_ocr(self, pdf_bytes: bytes) -> str | None:
-        """Извлечение текста через OCR (для сканированных документов)."""
+    def _extract_with_ocr(self, doc: fitz.Document, pdf_bytes: bytes) -> str | None:
+        """
+        Извлечение текста через OCR (для сканированных документов).
+        Воркеры пула открывают документ сами из pdf_bytes (Document не сериализуется).
+        """
         if not self.OCR_AVAILABLE:
             self.logger.warning("OCR not available, skipping OCR extraction")
             return None
 
         try:
-            pdf_file = io.BytesIO(pdf_bytes)
-            doc = fitz.open(stream=pdf_file, filetype="pdf")
+            page_count = doc.page_count
 
-            pages_text = []
-
-            for page in doc:
-                # Конвертируем страницу в изображение 300 DPI
-                pix = page.get_pixmap(matrix=fitz.Matrix(300 / 72, 300 / 72))
-                image = Image.open(io.BytesIO(pix.tobytes("png")))
-
-                # OCR
-                page_text = pytesseract.image_to_string(image, lang='eng', config='--psm 6')
-                if page_text and page_text.strip():
-                    pages_text.append(page_text.strip())
+            # Страницы распознаются параллельно (tesseract грузит CPU);
+            # для одной страницы пул процессов не поднимаем
+            if page_count <= 1:
+                ocr_results = [_ocr_document_page(page) for page in doc]
+            else:
+                ocr_results = _ocr_in_pool(pdf_bytes, page_count, self.TESSERACT_PATH)
 
-            doc.close()
+            pages_text = [page_text for page_text in ocr_results if page_text]
             result = "\n\n".join(pages_text) if pages_text else None
             if result:
                 self.logger.info(f"Successfully extracted text from {len(pages_text)} pages using OCR")
@@ -72,25 +72,29 @@ class RFC_5424_Logger:
         handler.setFormatter(self._formatter)
         self.logger.addHandler(handler)
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message)
+    def isEnabledFor(self, level: int) -> bool:
+        """Позволяет пропустить подготовку дорогих сообщений, если уровень отключён."""
+        return self.logger.isEnabledFor(level)
 
-    def info(self, message: str) -> None:
-        self.logger.info(message)
+    # Аргументы подставляются в message ("%s"-стиль) только если сообщение реально пишется
+    def debug(self, message: str, *args) -> None:
+        self.logger.debug(message, *args)
 
-    def warning(self, message: str) -> None:
-        self.logger.warning(message)
+    def info(self, message: str, *args) -> None:
+        self.logger.info(message, *args)
 
-    def error(self, message: str, exc_info: bool = True) -> None:
-        self.logger.error(message, exc_info=exc_info)
+    def warning(self, message: str, *args) -> None:
+        self.logger.warning(message, *args)
 
-    def critical(self, message: str, exc_info: bool = True) -> None:
-        self.logger.critical(message, exc_info=exc_info)
+    def error(self, message: str, *args, exc_info: bool = True) -> None:
+        self.logger.error(message, *args, exc_info=exc_info)
 
-    def log(self, level: int, message: str) -> None:
-        """Универсальный метод логирования с указанием уровня."""
-        self.logger.log(level, message)
+    def critical(self, message: str, *args, exc_info: bool = True) -> None:
+        self.logger.critical(message, *args, exc_info=exc_info)
 
+    def log(self, level: int, message: str, *args) -> None:
+        """Универсальный метод логирования с указанием уровня."""
+        self.logger.log(level, message, *args)
 
 if __name__ == "__main__":
     config = RFC_5424_LoggerConfig()
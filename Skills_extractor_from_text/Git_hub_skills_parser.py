@@ -1,31 +1,59 @@
-import requests
+import asyncio
+import re
+
+import aiohttp
 import pandas as pd
 
-def get_skills(url):
-   skills = []
-   try:
-      response = requests.get(url)
+# GitHub отдаёт максимум 100 элементов на страницу (для постраничных эндпоинтов)
+PER_PAGE = 100
+MAX_PAGES = 10
 
-      if response.status_code == 200:
-         data = response.json()
+# "Python.svg", "Python-Dark.svg", "Python-Light.svg" -> "Python"
+SKILL_ICON_PATTERN = re.compile(r'(.+?)(?:-(?:Dark|Light))?\.svg$')
 
-         for elem in data:
-            filename = elem['name']
 
-            if filename.endswith(".svg"):
-               skill = filename.replace(".svg", "")
+async def fetch(session, url, params=None):
+   """Возвращает (json, номер последней страницы из заголовка Link или None)"""
+   async with session.get(url, params=params) as response:
+      if response.status != 200:
+         print(f"Error: {response.status} for {url}")
+         return [], None
+
+      last = response.links.get('last')
+      last_page = int(last['url'].query.get('page', 1)) if last else None
+      return await response.json(), last_page
+
 
-               if skill.endswith("-Dark") or skill.endswith("-Light"):
-                  skill = skill.replace("-Dark", "").replace("-Light", "")
+async def fetch_all_pages(url):
+   # Эндпоинт contents не постраничный — отдаёт весь список одним ответом и без Link.
+   # Остальные страницы запрашиваем параллельно, только если GitHub сообщил rel="last"
+   async with aiohttp.ClientSession() as session:
+      first, last_page = await fetch(session, url, {'page': 1, 'per_page': PER_PAGE})
+      if not last_page or last_page <= 1:
+         return [first]
 
-               if skill not in skills:
-                  skills.append(skill)
-      else:
-         print("Error")
+      rest = await asyncio.gather(*[
+         fetch(session, url, {'page': page, 'per_page': PER_PAGE})
+         for page in range(2, min(last_page, MAX_PAGES) + 1)
+      ])
+      return [first] + [data for data, _ in rest]
+
+
+def get_skills(url):
+   # dict вместо set — сохраняет порядок иконок из API
+   skills = {}
+   try:
+      pages = asyncio.run(fetch_all_pages(url))
+
+      for data in pages:
+         for elem in data:
+            match = SKILL_ICON_PATTERN.match(elem['name'])
+            if match:
+               skills[match.group(1)] = None
    except Exception as e:
       print(e)
 
-   return skills
+   return list(skills)
 
 if __name__=='__main__':
    url = 'https://api.github.com/repos/tandpfun/skill-icons/contents/icons'
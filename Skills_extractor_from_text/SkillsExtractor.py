@@ -6,7 +6,8 @@ against a predefined dictionary of skills.
 
 Usage example:
     extractor = SkillsExtractor("path/to/skills.csv")
-    found = extractor.extract_skills("I know Python and SQL", "output.json")
+    found = extractor.extract_skills("I know Python and SQL")
+    extractor.save(found, "output.json")
 """
 
 from pathlib import Path
@@ -14,6 +15,15 @@ import json
 import csv
 from typing import List, Dict, Set
 
+# Lookup table for ASCII characters: avoids Unicode table walks in str.isalnum()
+_ALNUM = bytes(1 if chr(i).isalnum() else 0 for i in range(128))
+
+
+def _is_alnum(c: str) -> bool:
+    """Fast isalnum() for a single character, using the ASCII table when possible."""
+    code = ord(c)
+    return bool(_ALNUM[code]) if code < 128 else c.isalnum()
+
 
 class SkillsExtractor:
     """
@@ -113,33 +123,32 @@ class SkillsExtractor:
             "SQL" in "MySQL" -> False (part of larger word)
         """
         # Check if there's an alphanumeric character before the match
-        if start > 0 and text[start - 1].isalnum():
+        if start > 0 and _is_alnum(text[start - 1]):
             return False
         # Check if there's an alphanumeric character after the match
-        elif end < len(text) - 1 and text[end + 1].isalnum():
+        elif end < len(text) - 1 and _is_alnum(text[end + 1]):
             return False
 
         return True
 
-    def extract_skills(self, text: str, output_path: str) -> Set[str]:
+    def extract_skills(self, text: str) -> Set[str]:
         """
         Extract all matching skills from the given text.
 
         Performs a single pass through the text, checking at each position
         if any skill from the Trie matches starting from that position.
+        Does no I/O, so it is safe to call in tight loops over many texts.
 
         Args:
             text: Input text to search for skills.
-            output_path: Path where found skills will be saved as JSON.
 
         Returns:
             Set of found skill names (with original casing from CSV).
 
         Example:
-            extractor.extract_skills("Senior Python Developer", "out.json")
+            extractor.extract_skills("Senior Python Developer")
             {'Python'}
         """
-        output_path = Path(output_path)
         found_skills = set()
 
         # Normalize text: collapse whitespace and convert to lowercase
@@ -161,13 +170,39 @@ class SkillsExtractor:
                         found_skills.add(current['$'])  # Add original cased skill
                 end += 1
 
+        return found_skills
+
+    @staticmethod
+    def save(found_skills: Set[str], output_path: str) -> None:
+        """
+        Save found skills to a JSON file.
+
+        Args:
+            found_skills: Skills returned by extract_skills.
+            output_path: Path where found skills will be saved as JSON.
+        """
+        output_path = Path(output_path)
+
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Save results as JSON
-        with open(output_path, 'w') as f:
-            json.dump(list(found_skills), f)
+        # Encode in one go instead of json.dump's incremental writes
+        with open(output_path, 'w', buffering=64 * 1024) as f:
+            f.write(json.dumps(list(found_skills)))
+
+    def extract_skills_and_save(self, text: str, output_path: str) -> Set[str]:
+        """
+        Extract skills from the text and save them as JSON.
+
+        Args:
+            text: Input text to search for skills.
+            output_path: Path where found skills will be saved as JSON.
 
+        Returns:
+            Set of found skill names (with original casing from CSV).
+        """
+        found_skills = self.extract_skills(text)
+        self.save(found_skills, output_path)
         return found_skills
 
 
@@ -185,7 +220,7 @@ if __name__ == "__main__":
     """
 
     # 3. Extract skills and save to file
-    found = extractor.extract_skills(
+    found = extractor.extract_skills_and_save(
         text,
         "Project_for_using_llm/Artifacts/extracted_skills/skills.json"
     )
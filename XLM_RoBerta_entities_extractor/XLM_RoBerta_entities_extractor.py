@@ -2,10 +2,16 @@
 NER экстрактор с позициями сущностей в тексте
 """
 
-from transformers import AutoModelForTokenClassification, AutoTokenizer
+from transformers import AutoConfig, AutoModelForTokenClassification, AutoTokenizer
 import torch
-import json
+import numpy as np
+import orjson
+import logging
+import os
+import shutil
 from dataclasses import dataclass, asdict
+from functools import lru_cache
+from threading import Lock
 from typing import Optional
 
 from RFC_logging_system.LoggerFactory import get_logger
@@ -22,43 +28,315 @@ class Entity:
     end: int
 
 
+def _autocast_dtype(device: torch.device) -> torch.dtype:
+    """Тип для инференса: BF16 (Ampere+) или FP16 на GPU, FP32 на CPU"""
+    if device.type != "cuda":
+        return torch.float32
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+def _warmup(model, tokenizer, device: torch.device, dtype: torch.dtype):
+    """Прогоняет фиктивный вход максимальной длины, чтобы компиляция не попала на первый запрос"""
+    dummy_ids = torch.full((1, 512), tokenizer.pad_token_id, dtype=torch.long, device=device)
+    with torch.inference_mode(), torch.autocast(
+        device_type=device.type, dtype=dtype, enabled=device.type == "cuda"
+    ):
+        model(input_ids=dummy_ids, attention_mask=torch.ones_like(dummy_ids))
+
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, device_str: str):
+    """
+    Загружает модель и токенизатор один раз на процесс для пары (model_path, device).
+    Повторное создание экстрактора (в другом потоке/воркере) переиспользует загруженную модель.
+    """
+    logger = get_logger("XLM_RoBerta_entities_extractor")
+    device = torch.device(device_str)
+    dtype = _autocast_dtype(device)
+
+    model = AutoModelForTokenClassification.from_pretrained(model_path)
+    # Быстрый (Rust) токенизатор нужен для offset_mapping
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    if not tokenizer.is_fast:
+        raise ValueError(f"Для {model_path} недоступен быстрый токенизатор")
+    model.eval()
+    model.to(device=device, dtype=dtype)
+    logger.info("Model moved to device: %s (%s)", device, dtype)
+
+    # На GPU — BetterTransformer (fused MHA без переэкспорта), иначе или при его отсутствии —
+    # TorchInductor (PyTorch 2.x): фьюзит ядра и убирает накладные расходы на запуск.
+    # dynamic=True на CPU — длины входов разные, без него каждая новая длина перекомпилируется
+    # Компиляция/конвертация ошибается не при вызове, а на первом прогоне, поэтому
+    # обёртка подменяет model только после успешного прогрева — иначе остаёмся в eager
+    if device.type == "cuda":
+        try:
+            from optimum.bettertransformer import BetterTransformer
+
+            # keep_original_model — при ошибке прогрева исходная модель остаётся нетронутой
+            converted = BetterTransformer.transform(model, keep_original_model=True)
+            _warmup(converted, tokenizer, device, dtype)
+            logger.info("Model converted with BetterTransformer")
+            return converted, tokenizer
+        except Exception as e:
+            logger.warning("BetterTransformer unavailable, falling back to torch.compile: %s", e)
+
+    try:
+        # Без CUDA-графов (reduce-overhead): длина входа меняется от запроса к запросу,
+        # а граф с собственным пулом памяти записывался бы на каждую длину
+        compiled = torch.compile(model, dynamic=True)
+        _warmup(compiled, tokenizer, device, dtype)
+        model = compiled
+        logger.info("Model compiled with torch.compile")
+    except Exception as e:
+        logger.warning("torch.compile unavailable, using eager mode: %s", e)
+
+    return model, tokenizer
+
+
+@lru_cache(maxsize=4)
+def _load_onnx_session(model_path: str, onnx_model_path: str, quantized: bool = False):
+    """
+    Загружает ONNX Runtime сессию (с экспортом из model_path, если файла ещё нет).
+    ORT фьюзит attention/MLP и на CPU работает в разы быстрее PyTorch eager.
+
+    При quantized=True рядом с экспортом создаётся и загружается INT8-версия
+    (*.int8.onnx). Замер: python -m onnxruntime.transformers.benchmark -m <path> -p int8 -i 1 -b 1 -s 256
+    """
+    import onnxruntime as ort
+
+    logger = get_logger("XLM_RoBerta_entities_extractor")
+
+    if not os.path.exists(onnx_model_path):
+        # main_export пишет в папку и всегда под именем model.onnx
+        output_dir = os.path.dirname(onnx_model_path) or "."
+        exported_path = os.path.join(output_dir, "model.onnx")
+        if not os.path.exists(exported_path):
+            from optimum.exporters.onnx import main_export
+
+            logger.info("Exporting model to ONNX: %s", output_dir)
+            main_export(
+                model_path,
+                output=output_dir,
+                task="token-classification",
+                opset=17
+            )
+        # Другое имя в конфиге — копируем (model.onnx нужен test.py/ORTModel в этой же папке)
+        if os.path.abspath(exported_path) != os.path.abspath(onnx_model_path):
+            logger.info("Copying ONNX export to %s", onnx_model_path)
+            shutil.copyfile(exported_path, onnx_model_path)
+
+    if quantized:
+        quantized_path = os.path.splitext(onnx_model_path)[0] + ".int8.onnx"
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info("Quantizing ONNX model to INT8: %s", quantized_path)
+            quantize_dynamic(
+                model_input=onnx_model_path,
+                model_output=quantized_path,
+                weight_type=QuantType.QInt8,
+                op_types_to_quantize=["MatMul", "Gemm"]
+            )
+        onnx_model_path = quantized_path
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+
+    session = ort.InferenceSession(onnx_model_path, sess_options=options, providers=["CPUExecutionProvider"])
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    if not tokenizer.is_fast:
+        raise ValueError(f"Для {model_path} недоступен быстрый токенизатор")
+    id2label = AutoConfig.from_pretrained(model_path).id2label
+
+    logger.info("ONNX Runtime session loaded: %s", onnx_model_path)
+    return session, tokenizer, id2label
+
+
 class XLM_RoBerta_entities_extractor:
     """Извлекает именованные сущности с их позициями в тексте"""
 
-    def __init__(self, model_path: Optional[str] = None, device: Optional[str] = None):
+    # Сколько последних токенизаций держать в памяти
+    # (extract_entities и anonymize_text часто вызываются подряд для одного текста)
+    ENCODING_CACHE_SIZE = 128
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        device: Optional[str] = None,
+        onnx_model_path: Optional[str] = None,
+        quantized: Optional[bool] = None
+    ):
         """
         Args:
             model_path: Путь к модели (если None - берётся из конфига)
             device: Устройство для инференса ("cuda", "cpu" или None для автовыбора)
+            onnx_model_path: Путь к ONNX-модели для CPU (если None - берётся из конфига)
+            quantized: Использовать INT8-версию ONNX-модели (если None - берётся из конфига)
         """
         self.logger = get_logger("XLM_RoBerta_entities_extractor")
-        
+        config = XLM_RoBerta_entities_extractor_config()
+
+        if onnx_model_path is None:
+            onnx_model_path = config.ONNX_MODEL_PATH
+        if quantized is None:
+            quantized = config.QUANTIZED
+
         if model_path is None:
-            config = XLM_RoBerta_entities_extractor_config()
             model_path = config.MODEL_PATH
-            self.logger.debug(f"Using model path from config: {model_path}")
+            self.logger.debug("Using model path from config: %s", model_path)
         else:
-            self.logger.debug(f"Using provided model path: {model_path}")
-
-        self.logger.info(f"Loading model from: {model_path}")
-        try:
-            self.model = AutoModelForTokenClassification.from_pretrained(model_path)
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model.eval()
-            self.logger.info("Model and tokenizer loaded successfully")
-        except Exception as e:
-            self.logger.error(f"Failed to load model from {model_path}: {str(e)}")
-            raise
+            self.logger.debug("Using provided model path: %s", model_path)
 
         if device:
             self.device = torch.device(device)
-            self.logger.debug(f"Using specified device: {device}")
+            self.logger.debug("Using specified device: %s", device)
         else:
             self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            self.logger.debug(f"Auto-detected device: {self.device}")
+            self.logger.debug("Auto-detected device: %s", self.device)
+
+        # На GPU считаем в BF16 (Ampere+) или FP16 — argmax по логитам от этого не меняется
+        self.autocast_dtype = _autocast_dtype(self.device)
+        self.use_autocast = self.device.type == "cuda"
+
+        # На CPU предпочитаем ONNX Runtime; при его недоступности остаёмся на PyTorch
+        self.session = None
+        self.model = None
+        if self.device.type == "cpu" and onnx_model_path:
+            try:
+                self.session, self.tokenizer, self.id2label = _load_onnx_session(
+                    model_path, onnx_model_path, quantized
+                )
+                self.logger.info("Using ONNX Runtime backend")
+            except Exception as e:
+                self.logger.warning("ONNX Runtime unavailable, falling back to PyTorch: %s", e)
+
+        self._encode = lru_cache(maxsize=self.ENCODING_CACHE_SIZE)(self._encode_text)
+
+        if self.session is None:
+            self.logger.info("Loading model from: %s", model_path)
+            try:
+                self.model, self.tokenizer = _load_model(model_path, str(self.device))
+                self.id2label = self.model.config.id2label
+                self.logger.info("Model and tokenizer loaded successfully")
+            except Exception as e:
+                self.logger.error("Failed to load model from %s: %s", model_path, e)
+                raise
+
+    def _encode_text(self, text: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Токенизирует текст (без кэша — используйте self._encode).
 
-        self.model.to(self.device)
-        self.logger.info(f"Model moved to device: {self.device}")
+        Returns:
+            (input_ids [1, T], attention_mask [1, T], offset_mapping [T, 2]) — только для чтения
+        """
+        encoding = self.tokenizer(
+            text,
+            truncation=True,
+            max_length=512,
+            return_offsets_mapping=True
+        )
+
+        arrays = (
+            np.asarray([encoding["input_ids"]], dtype=np.int64),
+            np.asarray([encoding["attention_mask"]], dtype=np.int64),
+            # Позиции берём напрямую из Rust-энкодинга, минуя torch-тензор
+            np.asarray(encoding["offset_mapping"], dtype=np.int32)
+        )
+        # Массивы разделяются между вызовами через кэш
+        for array in arrays:
+            array.flags.writeable = False
+        return arrays
+
+    def _predict_ids(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        Прогоняет модель и возвращает id предсказанных меток.
+
+        Args:
+            input_ids: [B, T] id токенов
+            attention_mask: [B, T] маска внимания
+
+        Returns:
+            [B, T] массив id меток (argmax по логитам)
+        """
+        if self.session is not None:
+            logits = self.session.run(None, {
+                "input_ids": input_ids.astype(np.int64, copy=False),
+                "attention_mask": attention_mask.astype(np.int64, copy=False)
+            })[0]
+            return logits.argmax(-1)
+
+        with torch.inference_mode(), torch.autocast(
+            device_type=self.device.type, dtype=self.autocast_dtype, enabled=self.use_autocast
+        ):
+            outputs = self.model(
+                input_ids=torch.tensor(input_ids, device=self.device),
+                attention_mask=torch.tensor(attention_mask, device=self.device)
+            )
+
+        # Один перенос GPU -> CPU на весь тензор вместо списка Python-объектов
+        return outputs.logits.argmax(-1).cpu().numpy()
+
+    @staticmethod
+    def _flush(entities: list[Entity], type_: str, start: int, end: int, text: str):
+        """Вырезает текст завершённой сущности и добавляет её в список (если не пустая)"""
+        entity_text = text[start:end].strip()
+        if entity_text:
+            entities.append(Entity(type=type_, text=entity_text, start=start, end=end))
+
+    def _decode(self, text: str, predictions: np.ndarray, offset_mapping: np.ndarray) -> list[Entity]:
+        """
+        Собирает сущности из BIO-меток одной строки батча.
+
+        Args:
+            text: Исходный текст
+            predictions: [T] id предсказанных меток
+            offset_mapping: [T, 2] позиции токенов в тексте
+
+        Returns:
+            Список Entity
+        """
+        entities = []
+        current_entity_type = None
+        current_start = None
+        current_end = None
+
+        # Специальные и pad-токены имеют offset (0, 0) — отбрасываем их заранее
+        starts = offset_mapping[:, 0]
+        ends = offset_mapping[:, 1]
+        valid = np.flatnonzero((starts != 0) | (ends != 0))
+
+        for idx in valid:
+            start = int(starts[idx])
+            end = int(ends[idx])
+            label = self.id2label[int(predictions[idx])]
+
+            if label.startswith("B-"):
+                # Сохраняем предыдущую сущность
+                if current_entity_type is not None:
+                    self._flush(entities, current_entity_type, current_start, current_end, text)
+
+                # Начинаем новую сущность
+                current_entity_type = label[2:]
+                current_start = start
+                current_end = end
+
+            elif label.startswith("I-") and current_entity_type == label[2:]:
+                # Продолжаем текущую сущность (только если тип совпадает)
+                current_end = end
+
+            else:  # "O" или несовпадение типа
+                if current_entity_type is not None:
+                    self._flush(entities, current_entity_type, current_start, current_end, text)
+                    current_entity_type = None
+                    current_start = None
+                    current_end = None
+
+        # Последняя сущность
+        if current_entity_type is not None:
+            self._flush(entities, current_entity_type, current_start, current_end, text)
+
+        return entities
 
     def extract(self, text: str) -> list[Entity]:
         """
@@ -70,7 +348,7 @@ class XLM_RoBerta_entities_extractor:
         Returns:
             Список Entity с типом, текстом и позициями (start, end)
         """
-        self.logger.debug(f"Starting entity extraction for text: {text[:100]}...")
+        self.logger.debug("Starting entity extraction for text: %.100s...", text)
         
         if not text or not text.strip():
             self.logger.warning("Empty text provided for entity extraction")
@@ -79,94 +357,96 @@ class XLM_RoBerta_entities_extractor:
         try:
             # Токенизация с offset_mapping для получения позиций
             self.logger.debug("Tokenizing input text")
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                return_offsets_mapping=True
-            )
-
-            offset_mapping = inputs.pop("offset_mapping")[0].tolist()
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            input_ids, attention_mask, offset_mapping = self._encode(text)
 
             # Предсказание
             self.logger.debug("Running model inference")
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-
-            predictions = torch.argmax(outputs.logits, dim=2)[0].tolist()
-            self.logger.debug(f"Model predictions generated, total tokens: {len(predictions)}")
-
-            # Собираем сущности
-            entities = []
-            current_entity_type = None
-            current_start = None
-            current_end = None
-
-            for idx, (pred_id, (start, end)) in enumerate(zip(predictions, offset_mapping)):
-                # Пропускаем специальные токены
-                if start == 0 and end == 0:
-                    continue
-
-                label = self.model.config.id2label[pred_id]
-
-                if label.startswith("B-"):
-                    # Сохраняем предыдущую сущность
-                    if current_entity_type is not None:
-                        entity_text = text[current_start:current_end]
-                        if entity_text.strip():
-                            entities.append(Entity(
-                                type=current_entity_type,
-                                text=entity_text.strip(),
-                                start=current_start,
-                                end=current_end
-                            ))
-
-                    # Начинаем новую сущность
-                    current_entity_type = label[2:]
-                    current_start = start
-                    current_end = end
-
-                elif label.startswith("I-") and current_entity_type == label[2:]:
-                    # Продолжаем текущую сущность (только если тип совпадает)
-                    current_end = end
-
-                else:  # "O" или несовпадение типа
-                    if current_entity_type is not None:
-                        entity_text = text[current_start:current_end]
-                        if entity_text.strip():
-                            entities.append(Entity(
-                                type=current_entity_type,
-                                text=entity_text.strip(),
-                                start=current_start,
-                                end=current_end
-                            ))
-                        current_entity_type = None
-                        current_start = None
-                        current_end = None
-
-            # Последняя сущность
-            if current_entity_type is not None:
-                entity_text = text[current_start:current_end]
-                if entity_text.strip():
-                    entities.append(Entity(
-                        type=current_entity_type,
-                        text=entity_text.strip(),
-                        start=current_start,
-                        end=current_end
-                    ))
-
-            self.logger.info(f"Entity extraction completed. Found {len(entities)} entities")
-            for entity in entities:
-                self.logger.debug(f"Found entity: [{entity.start}:{entity.end}] {entity.type}: '{entity.text}'")
+            predictions = self._predict_ids(input_ids, attention_mask)[0]
+
+            entities = self._decode(text, predictions, offset_mapping)
+
+            self.logger.info(
+                "Entity extraction completed. Found %d entities in %d tokens", len(entities), len(predictions)
+            )
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for entity in entities:
+                    self.logger.debug("Found entity: [%d:%d] %s: %r", entity.start, entity.end, entity.type, entity.text)
             
             return entities
             
         except Exception as e:
-            self.logger.error(f"Error during entity extraction: {str(e)}")
+            self.logger.error("Error during entity extraction: %s", e)
+            raise
+
+    def extract_batch(self, texts: list[str]) -> list[list[Entity]]:
+        """
+        Извлекает сущности из нескольких текстов за один прогон модели.
+
+        Токенизация и forward выполняются одним батчем (с паддингом),
+        постобработка — по строкам результата.
+
+        Args:
+            texts: Список входных текстов
+
+        Returns:
+            Список сущностей для каждого текста (в том же порядке)
+        """
+        results: list[list[Entity]] = [[] for _ in texts]
+        batch_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+
+        if not batch_indices:
+            self.logger.warning("Empty texts provided for batch entity extraction")
+            return results
+
+        try:
+            batch_texts = [texts[i] for i in batch_indices]
+            self.logger.debug("Tokenizing batch of %d texts", len(batch_texts))
+            encoding = self.tokenizer(
+                batch_texts,
+                padding=True,
+                truncation=True,
+                max_length=512,
+                return_offsets_mapping=True,
+                return_tensors="np"
+            )
+
+            self.logger.debug("Running batch model inference")
+            predictions = self._predict_ids(encoding["input_ids"], encoding["attention_mask"])
+            offset_mapping = encoding["offset_mapping"]
+
+            for row, i in enumerate(batch_indices):
+                results[i] = self._decode(texts[i], predictions[row], offset_mapping[row])
+
+            self.logger.info(
+                "Batch entity extraction completed. %d texts, %d entities",
+                len(texts), sum(len(r) for r in results)
+            )
+            return results
+
+        except Exception as e:
+            self.logger.error("Error during batch entity extraction: %s", e)
             raise
 
+    @staticmethod
+    def _entities_to_json(text: str, entities: list[Entity]) -> dict:
+        """Формирует JSON-совместимый словарь из найденных сущностей"""
+        # Группируем по типу
+        by_type: dict[str, list[str]] = {}
+        seen_by_type: dict[str, set[str]] = {}
+        for e in entities:
+            if e.type not in by_type:
+                by_type[e.type] = []
+                seen_by_type[e.type] = set()
+            if e.text not in seen_by_type[e.type]:  # Избегаем дубликатов
+                seen_by_type[e.type].add(e.text)
+                by_type[e.type].append(e.text)
+
+        return {
+            "text": text,
+            "entities": [asdict(e) for e in entities],
+            "entities_by_type": by_type
+        }
+
     def extract_to_json(self, text: str) -> dict:
         """
         Извлекает сущности и возвращает JSON-совместимый словарь.
@@ -189,26 +469,22 @@ class XLM_RoBerta_entities_extractor:
         
         try:
             entities = self.extract(text)
-
-            # Группируем по типу
-            by_type: dict[str, list[str]] = {}
-            for e in entities:
-                if e.type not in by_type:
-                    by_type[e.type] = []
-                if e.text not in by_type[e.type]:  # Избегаем дубликатов
-                    by_type[e.type].append(e.text)
-
-            result = {
-                "text": text,
-                "entities": [asdict(e) for e in entities],
-                "entities_by_type": by_type
-            }
+            result = self._entities_to_json(text, entities)
             
-            self.logger.debug(f"JSON extraction completed. Total entities: {len(entities)}")
+            self.logger.debug("JSON extraction completed. Total entities: %d", len(entities))
             return result
             
         except Exception as e:
-            self.logger.error(f"Error during JSON extraction: {str(e)}")
+            self.logger.error("Error during JSON extraction: %s", e)
+            raise
+
+    def extract_to_json_batch(self, texts: list[str]) -> list[dict]:
+        """Батч-версия extract_to_json: один словарь на каждый текст"""
+        try:
+            batch_entities = self.extract_batch(texts)
+            return [self._entities_to_json(text, entities) for text, entities in zip(texts, batch_entities)]
+        except Exception as e:
+            self.logger.error("Error during batch JSON extraction: %s", e)
             raise
 
     def anonymize(
@@ -237,119 +513,199 @@ class XLM_RoBerta_entities_extractor:
                 ]
             }
         """
-        self.logger.debug(f"Starting text anonymization with format: {placeholder_format}")
+        self.logger.debug("Starting text anonymization with format: %s", placeholder_format)
         
         try:
             entities = self.extract(text)
+            return self._anonymize_entities(text, entities, placeholder_format, entity_types)
+            
+        except Exception as e:
+            self.logger.error("Error during text anonymization: %s", e)
+            raise
 
-            # Фильтруем по типам если указано
-            if entity_types:
-                self.logger.debug(f"Filtering entities by types: {entity_types}")
-                entities = [e for e in entities if e.type in entity_types]
-
-            if not entities:
-                self.logger.debug("No entities found for anonymization")
-                return {
-                    "original_text": text,
-                    "anonymized_text": text,
-                    "replacements": []
-                }
-
-            # Сортируем по позиции в обратном порядке (с конца),
-            # чтобы замены не сбивали индексы
-            entities_sorted = sorted(entities, key=lambda e: e.start, reverse=True)
-            self.logger.debug(f"Found {len(entities)} entities to anonymize")
-
-            anonymized = text
-            replacements = []
-
-            for entity in entities_sorted:
-                # Формируем плейсхолдер
-                if "{type}" in placeholder_format:
-                    placeholder = placeholder_format.format(type=entity.type)
-                else:
-                    placeholder = placeholder_format
-
-                # Заменяем
-                anonymized = anonymized[:entity.start] + placeholder + anonymized[entity.end:]
-
-                replacements.append({
-                    "type": entity.type,
-                    "original": entity.text,
-                    "replacement": placeholder,
-                    "start": entity.start,
-                    "end": entity.end
-                })
-
-                self.logger.debug(f"Replaced entity: '{entity.text}' -> '{placeholder}' at [{entity.start}:{entity.end}]")
+    def anonymize_batch(
+        self,
+        texts: list[str],
+        placeholder_format: str = "[{type}]",
+        entity_types: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Батч-версия anonymize: сущности для всех текстов ищутся одним прогоном модели"""
+        self.logger.debug("Starting batch anonymization with format: %s", placeholder_format)
 
-            # Разворачиваем для хронологического порядка
-            replacements.reverse()
+        try:
+            batch_entities = self.extract_batch(texts)
+            return [
+                self._anonymize_entities(text, entities, placeholder_format, entity_types)
+                for text, entities in zip(texts, batch_entities)
+            ]
+        except Exception as e:
+            self.logger.error("Error during batch text anonymization: %s", e)
+            raise
 
-            self.logger.info(f"Anonymization completed. {len(replacements)} replacements made")
+    def _anonymize_entities(
+        self,
+        text: str,
+        entities: list[Entity],
+        placeholder_format: str,
+        entity_types: Optional[list[str]]
+    ) -> dict:
+        """Заменяет уже найденные сущности на плейсхолдеры (см. anonymize)"""
+        # Фильтруем по типам если указано
+        if entity_types:
+            self.logger.debug("Filtering entities by types: %s", entity_types)
+            entities = [e for e in entities if e.type in entity_types]
+
+        if not entities:
+            self.logger.debug("No entities found for anonymization")
             return {
                 "original_text": text,
-                "anonymized_text": anonymized,
-                "replacements": replacements
+                "anonymized_text": text,
+                "replacements": []
             }
-            
-        except Exception as e:
-            self.logger.error(f"Error during text anonymization: {str(e)}")
-            raise
+
+        # Один проход слева направо: куски текста и плейсхолдеры собираются в список
+        # и склеиваются одним join, без копирования всего текста на каждую сущность
+        entities_sorted = sorted(entities, key=lambda e: e.start)
+        self.logger.debug("Found %d entities to anonymize", len(entities))
+
+        # Плейсхолдер форматируется один раз на тип, а не на каждую сущность;
+        # формат без {type} — одна константная строка для всех
+        if "{type}" in placeholder_format:
+            placeholders = {t: placeholder_format.format(type=t) for t in {e.type for e in entities}}
+        else:
+            placeholders = None
+
+        parts = []
+        cursor = 0
+        replacements = []
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+        for entity in entities_sorted:
+            # Пересекающуюся с уже заменённой сущность пропускаем
+            if entity.start < cursor:
+                if debug_enabled:
+                    self.logger.debug("Skipped overlapping entity: %r at [%d:%d]", entity.text, entity.start, entity.end)
+                continue
+
+            placeholder = placeholders[entity.type] if placeholders is not None else placeholder_format
+
+            # Заменяем
+            parts.append(text[cursor:entity.start])
+            parts.append(placeholder)
+            cursor = entity.end
+
+            replacements.append({
+                "type": entity.type,
+                "original": entity.text,
+                "replacement": placeholder,
+                "start": entity.start,
+                "end": entity.end
+            })
+
+            if debug_enabled:
+                self.logger.debug(
+                    "Replaced entity: %r -> %r at [%d:%d]", entity.text, placeholder, entity.start, entity.end
+                )
+
+        parts.append(text[cursor:])
+        anonymized = "".join(parts)
+
+        self.logger.info("Anonymization completed. %d replacements made", len(replacements))
+        return {
+            "original_text": text,
+            "anonymized_text": anonymized,
+            "replacements": replacements
+        }
 
 
 # ============================================
 # Удобные функции для быстрого использования
 # ============================================
 
-_extractor: Optional[XLM_RoBerta_entities_extractor] = None
+# Аргументы, с которыми строится глобальный экстрактор (задаются через init_extractor)
+_extractor_args: tuple = (None, None, None, None)
+_extractor_lock = Lock()
+
 
+@lru_cache(maxsize=1)
+def _build_extractor(
+    model_path: Optional[str],
+    device: Optional[str],
+    onnx_model_path: Optional[str],
+    quantized: Optional[bool]
+) -> XLM_RoBerta_entities_extractor:
+    """Создаёт экстрактор; кэш хранит единственный экземпляр"""
+    return XLM_RoBerta_entities_extractor(model_path, device, onnx_model_path, quantized)
 
-def init_extractor(model_path: Optional[str] = None, device: Optional[str] = None):
-    """Инициализирует глобальный экстрактор"""
-    global _extractor
+
+def _get_extractor() -> XLM_RoBerta_entities_extractor:
+    """
+    Возвращает глобальный экстрактор, создавая его при первом обращении.
+    Lock гарантирует единственную загрузку модели при конкурентных вызовах.
+    """
+    with _extractor_lock:
+        return _build_extractor(*_extractor_args)
+
+
+def _dump(result) -> bytes:
+    """Сериализует результат в JSON через orjson (быстрее json.dumps в разы)"""
+    return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+
+
+def init_extractor(
+    model_path: Optional[str] = None,
+    device: Optional[str] = None,
+    onnx_model_path: Optional[str] = None,
+    quantized: Optional[bool] = None
+):
+    """
+    Инициализирует глобальный экстрактор.
+
+    Необязателен: без него экстрактор создаётся с параметрами из конфига
+    при первом вызове extract_entities/anonymize_text.
+    """
+    global _extractor_args
     logger = get_logger("XLM_RoBerta_entities_extractor")
     
     logger.info("Initializing global extractor")
     try:
-        _extractor = XLM_RoBerta_entities_extractor(model_path, device)
+        _extractor_args = (model_path, device, onnx_model_path, quantized)
+        _get_extractor()
         logger.info("Global extractor initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize global extractor: {str(e)}")
+        logger.error("Failed to initialize global extractor: %s", e)
         raise
 
 
-def extract_entities(text: str) -> dict:
+def extract_entities(text: str, as_bytes: bool = False) -> dict | bytes:
     """
     Извлекает сущности из текста.
 
     Args:
         text: Текст для анализа
+        as_bytes: Вернуть готовый JSON (orjson) вместо словаря
 
     Returns:
         JSON-совместимый словарь с сущностями и их позициями
     """
     logger = get_logger("XLM_RoBerta_entities_extractor")
     
-    if _extractor is None:
-        logger.error("Global extractor not initialized. Call init_extractor() first")
-        raise RuntimeError("Сначала вызовите init_extractor()")
-    
     logger.debug("Extracting entities using global extractor")
     try:
-        result = _extractor.extract_to_json(text)
+        result = _get_extractor().extract_to_json(text)
         logger.debug("Entity extraction completed successfully")
-        return result
+        return _dump(result) if as_bytes else result
     except Exception as e:
-        logger.error(f"Error during entity extraction: {str(e)}")
+        logger.error("Error during entity extraction: %s", e)
         raise
 
 
 def anonymize_text(
     text: str,
     placeholder_format: str = "[{type}]",
-    entity_types: Optional[list[str]] = None
-) -> dict:
+    entity_types: Optional[list[str]] = None,
+    as_bytes: bool = False
+) -> dict | bytes:
     """
     Анонимизирует текст.
 
@@ -357,26 +713,68 @@ def anonymize_text(
         text: Текст для анонимизации
         placeholder_format: Формат замены
         entity_types: Типы сущностей для замены (None = все)
+        as_bytes: Вернуть готовый JSON (orjson) вместо словаря
 
     Returns:
         Словарь с original_text, anonymized_text, replacements
     """
     logger = get_logger("XLM_RoBerta_entities_extractor")
     
-    if _extractor is None:
-        logger.error("Global extractor not initialized. Call init_extractor() first")
-        raise RuntimeError("Сначала вызовите init_extractor()")
-    
-    logger.debug(f"Anonymizing text with format: {placeholder_format}")
+    logger.debug("Anonymizing text with format: %s", placeholder_format)
     try:
-        result = _extractor.anonymize(text, placeholder_format, entity_types)
+        result = _get_extractor().anonymize(text, placeholder_format, entity_types)
         logger.debug("Text anonymization completed successfully")
-        return result
+        return _dump(result) if as_bytes else result
+    except Exception as e:
+        logger.error("Error during text anonymization: %s", e)
+        raise
+
+
+def extract_entities_batch(texts: list[str]) -> list[dict]:
+    """
+    Извлекает сущности из нескольких текстов одним прогоном модели.
+
+    Args:
+        texts: Тексты для анализа
+
+    Returns:
+        Список JSON-совместимых словарей (как у extract_entities) в порядке texts
+    """
+    logger = get_logger("XLM_RoBerta_entities_extractor")
+
+    logger.debug("Extracting entities for %d texts using global extractor", len(texts))
+    try:
+        return _get_extractor().extract_to_json_batch(texts)
     except Exception as e:
-        logger.error(f"Error during text anonymization: {str(e)}")
+        logger.error("Error during batch entity extraction: %s", e)
         raise
 
 
+def anonymize_text_batch(
+    texts: list[str],
+    placeholder_format: str = "[{type}]",
+    entity_types: Optional[list[str]] = None
+) -> list[dict]:
+    """
+    Анонимизирует несколько текстов одним прогоном модели.
+
+    Args:
+        texts: Тексты для анонимизации
+        placeholder_format: Формат замены
+        entity_types: Типы сущностей для замены (None = все)
+
+    Returns:
+        Список словарей (как у anonymize_text) в порядке texts
+    """
+    logger = get_logger("XLM_RoBerta_entities_extractor")
+
+    logger.debug("Anonymizing %d texts with format: %s", len(texts), placeholder_format)
+    try:
+        return _get_extractor().anonymize_batch(texts, placeholder_format, entity_types)
+    except Exception as e:
+        logger.error("Error during batch text anonymization: %s", e)
+        raise
+
 # ============================================
 # MAIN - демонстрация
 # ============================================
@@ -386,7 +784,7 @@ if __name__ == "__main__":
     logger.info("Starting XLM_RoBerta_entities_extractor demonstration")
     # Путь берётся из конфига автоматически
     try:
-        extractor = XLM_RoBerta_entities_extractor()
+        extractor = _get_extractor()
 
         test_text = "Іванов Іван Петрович - Senior Python Developer в компанії Google, Київ. Навички: Python, Django, PostgreSQL. Досвід: 2020-2024."
 
@@ -403,7 +801,7 @@ if __name__ == "__main__":
         # JSON формат
         print("\n📄 JSON:")
         result = extractor.extract_to_json(test_text)
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        print(orjson.dumps(result).decode())
 
         # Анонимизация
         print("\n" + "=" * 60)
@@ -427,5 +825,5 @@ if __name__ == "__main__":
         logger.info("Demonstration completed successfully")
         
     except Exception as e:
-        logger.error(f"Error during demonstration: {str(e)}")
+        logger.error("Error during demonstration: %s", e)
         raise
\ No newline at end of file
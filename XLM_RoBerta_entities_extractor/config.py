@@ -4,10 +4,20 @@
 
 import os
 
+from RFC_logging_system.config import str_to_bool
+
 
 class XLM_RoBerta_entities_extractor_config:
     def __init__(self):
         self.MODEL_PATH = os.getenv(
             "MODEL_PATH",
             "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output"
-        )
\ No newline at end of file
+        )
+        # ONNX-версия модели для инференса на CPU (пустая строка — только PyTorch).
+        # Если файла нет, он экспортируется из MODEL_PATH при первой загрузке.
+        self.ONNX_MODEL_PATH = os.getenv(
+            "ONNX_MODEL_PATH",
+            "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output/onnx/model.onnx"
+        )
+        # INT8 динамическая квантизация MatMul/Gemm (в 2 раза меньше модель, VNNI на CPU)
+        self.QUANTIZED = str_to_bool(os.getenv("QUANTIZED", "true"))
@@ -1,16 +1,144 @@
 import os
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterator
+import numpy as np
+import xxhash
+from numba import njit
 from datasets import Dataset
-from sklearn.model_selection import train_test_split
 
 
-def parse_conll(file_path: str) -> Tuple[List[List[str]], List[List[str]]]:
-    """Читает CoNLL файл, возвращает (sentences, labels)."""
+# UTF-8 последовательности не-ASCII пробелов, которые str.strip()/str.split() тоже
+# считают разделителями (NEL, NBSP, U+1680, U+2000-U+200A, U+2028/2029, U+202F, U+205F, U+3000)
+_UNICODE_SPACES = (
+    b'\xc2\x85', b'\xc2\xa0', b'\xe1\x9a\x80',
+    *(b'\xe2\x80' + bytes([c]) for c in range(0x80, 0x8b)),
+    b'\xe2\x80\xa8', b'\xe2\x80\xa9', b'\xe2\x80\xaf', b'\xe2\x81\x9f', b'\xe3\x80\x80',
+)
+
+
+@njit(cache=True)
+def _is_space(byte) -> bool:
+    """ASCII-пробелы в смысле str.split() (\t \n \v \f \r, 0x1c-0x1f, пробел)."""
+    return byte == 32 or 9 <= byte <= 13 or 28 <= byte <= 31
+
+
+@njit(cache=True)
+def _scan_conll(buf):
+    """
+    Разбирает CoNLL побайтово, без создания строк на каждую строку файла.
+
+    Возвращает массив [N, 5]: (tok_start, tok_end, tag_start, tag_end, sent_id)
+    — байтовые границы токена и метки и номер предложения.
+    """
+    n = buf.shape[0]
+
+    # Записей не больше, чем строк в файле
+    n_lines = 1
+    for i in range(n):
+        if buf[i] == 10:
+            n_lines += 1
+    out = np.empty((n_lines, 5), dtype=np.int64)
+
+    count = 0
+    sent_id = 0
+    has_tokens = False
+    line_start = 0
+
+    while line_start <= n:
+        line_end = line_start
+        while line_end < n and buf[line_end] != 10:
+            line_end += 1
+        next_line = line_end + 1
+
+        # strip()
+        ls = line_start
+        le = line_end
+        while ls < le and _is_space(buf[ls]):
+            ls += 1
+        while le > ls and _is_space(buf[le - 1]):
+            le -= 1
+
+        if ls == le:
+            # Пустая строка — граница предложения
+            if has_tokens:
+                sent_id += 1
+                has_tokens = False
+            line_start = next_line
+            continue
+
+        if buf[ls] == 35:  # '#'
+            line_start = next_line
+            continue
+
+        has_tab = False
+        for i in range(ls, le):
+            if buf[i] == 9:
+                has_tab = True
+                break
+
+        # Первое и последнее поле строки (parts[0] и parts[-1])
+        tok_end = ls
+        tag_start = le
+        if has_tab:
+            while buf[tok_end] != 9:
+                tok_end += 1
+            while buf[tag_start - 1] != 9:
+                tag_start -= 1
+        else:
+            while tok_end < le and not _is_space(buf[tok_end]):
+                tok_end += 1
+            while tag_start > ls and not _is_space(buf[tag_start - 1]):
+                tag_start -= 1
+
+        # Меньше двух полей — строку пропускаем
+        if tok_end < le:
+            out[count, 0] = ls
+            out[count, 1] = tok_end
+            out[count, 2] = tag_start
+            out[count, 3] = le
+            out[count, 4] = sent_id
+            count += 1
+            has_tokens = True
+
+        line_start = next_line
+
+    return out[:count]
+
+
+def iter_conll(file_path: str) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Читает CoNLL файл, отдаёт предложения по одному: (tokens, tags).
+
+    Разметка строк делается в _scan_conll (Numba); разделители ищутся только
+    среди ASCII-пробелов, что для UTF-8 безопасно. Строки создаются только
+    для текущего предложения. Если в файле есть не-ASCII пробелы или одиночный
+    '\r' (текстовый режим считает его концом строки), файл читается построчно
+    в Python — результат тот же, что у str.strip()/str.split().
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Файл не найден: {file_path}")
 
-    sentences, labels = [], []
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if data.count(b'\r') != data.count(b'\r\n') or any(seq in data for seq in _UNICODE_SPACES):
+        yield from _iter_conll_text(file_path)
+        return
+
+    records = _scan_conll(np.frombuffer(data, dtype=np.uint8))
+
+    # Границы предложений — места, где меняется sent_id
+    bounds = np.flatnonzero(np.diff(records[:, 4])) + 1
+    for chunk in np.split(records, bounds):
+        if not len(chunk):
+            continue
+        tokens = [data[s:e].decode('utf-8') for s, e in chunk[:, 0:2].tolist()]
+        tags = [data[s:e].decode('utf-8') for s, e in chunk[:, 2:4].tolist()]
+        yield tokens, tags
+
+
+def _iter_conll_text(file_path: str) -> Iterator[Tuple[List[str], List[str]]]:
+    """Построчный разбор CoNLL на str — для файлов, которые _scan_conll не покрывает."""
     tokens, tags = [], []
 
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -20,8 +148,7 @@ def parse_conll(file_path: str) -> Tuple[List[List[str]], List[List[str]]]:
 
             if not line:
                 if tokens:
-                    sentences.append(tokens)
-                    labels.append(tags)
+                    yield tokens, tags
                     tokens, tags = [], []
                 continue
 
@@ -30,9 +157,16 @@ def parse_conll(file_path: str) -> Tuple[List[List[str]], List[List[str]]]:
                 tokens.append(parts[0])
                 tags.append(parts[-1])
 
-        if tokens:  # Добавляем последний буфер
-            sentences.append(tokens)
-            labels.append(tags)
+    if tokens:  # Последнее предложение
+        yield tokens, tags
+
+
+def parse_conll(file_path: str) -> Tuple[List[List[str]], List[List[str]]]:
+    """Читает CoNLL файл, возвращает (sentences, labels)."""
+    sentences, labels = [], []
+    for tokens, tags in iter_conll(file_path):
+        sentences.append(tokens)
+        labels.append(tags)
 
     return sentences, labels
 
@@ -41,25 +175,28 @@ def split_and_save_data(source_path: str, train_path: str, val_path: str, split_
     """Делит исходный файл на train/val и сохраняет на диск."""
     print(f"📦 Разделение данных из {source_path}...")
 
-    # Сначала парсим, чтобы делить по предложениям, а не по строкам
-    sentences, labels = parse_conll(source_path)
+    Path(os.path.dirname(train_path)).mkdir(parents=True, exist_ok=True)
 
-    # Собираем обратно в текст для записи
-    text_examples = []
-    for sent, lab in zip(sentences, labels):
-        lines = [f"{t} {l}" for t, l in zip(sent, lab)]
-        text_examples.append("\n".join(lines))
+    # Предложение попадает в val по хешу своих токенов: сплит детерминирован
+    # (seed 42) и потоковый — весь корпус в памяти не собирается
+    threshold = round(split_ratio * 100)
+    counts = [0, 0]  # train, val
 
-    train_ex, val_ex = train_test_split(text_examples, test_size=split_ratio, random_state=42)
+    with open(train_path, 'w', encoding='utf-8', buffering=1 << 20) as train_f, \
+            open(val_path, 'w', encoding='utf-8', buffering=1 << 20) as val_f:
+        files = (train_f, val_f)
 
-    Path(os.path.dirname(train_path)).mkdir(parents=True, exist_ok=True)
+        # Делим по предложениям, а не по строкам
+        for tokens, tags in iter_conll(source_path):
+            is_val = xxhash.xxh64("|".join(tokens).encode('utf-8'), seed=42).intdigest() % 100 < threshold
+            example = "\n".join(f"{t} {l}" for t, l in zip(tokens, tags))
 
-    with open(train_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(train_ex))
-    with open(val_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(val_ex))
+            if counts[is_val]:
+                files[is_val].write('\n\n')
+            files[is_val].write(example)
+            counts[is_val] += 1
 
-    print(f"✅ Созданы файлы: Train ({len(train_ex)}), Val ({len(val_ex)})")
+    print(f"✅ Созданы файлы: Train ({counts[0]}), Val ({counts[1]})")
 
 
 def create_dataset(file_path: str, label2id: Dict[str, int] = None) -> Tuple[Dataset, Dict[str, int]]:
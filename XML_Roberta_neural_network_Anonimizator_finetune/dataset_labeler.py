@@ -3,14 +3,20 @@ Dataset Entity Labeler using ChatGPT API
 Converts raw resume text to CoNLL format with entity labels
 """
 
-import json
+import asyncio
+import importlib.util
+import mmap
 import re
 import os
-import time
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Tuple
-from openai import AzureOpenAI, BadRequestError, RateLimitError
+from typing import List, Dict, Tuple, Iterator, Optional
+from openai import AsyncAzureOpenAI, BadRequestError, RateLimitError
 from dataclasses import dataclass
+import ahocorasick
+import httpx
+import orjson
+import numpy as np
 from tqdm import tqdm
 
 # Add parent directory to path for imports
@@ -19,6 +25,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ChatGPT.config import ChatGPTConfig
 
+# Compiled once: these run for every API response / every resume
+_FENCE_OPEN = re.compile(r'^```(?:json)?\n?')
+_FENCE_CLOSE = re.compile(r'\n?```$')
+_TOKEN_PATTERN = re.compile(r'\S+')
+
+# Checkpoint file layout: resume index as 8-byte little-endian int, rest reserved
+CHECKPOINT_SIZE = 16
+
 
 @dataclass
 class Entity:
@@ -29,6 +43,46 @@ class Entity:
     end: int
 
 
+@dataclass
+class EntitySpans:
+    """
+    Entities of one text stored column-wise (structure of arrays)
+    
+    type_ids index into type_names. Entity objects are only built on access,
+    so sorting and tagging work on compact NumPy arrays.
+    """
+    type_names: List[str]
+    type_ids: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    texts: List[str]
+    
+    @classmethod
+    def empty(cls) -> "EntitySpans":
+        return cls(
+            type_names=[],
+            type_ids=np.empty(0, dtype=np.int8),
+            starts=np.empty(0, dtype=np.int32),
+            ends=np.empty(0, dtype=np.int32),
+            texts=[]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def __getitem__(self, i: int) -> Entity:
+        return Entity(
+            type=self.type_names[self.type_ids[i]],
+            text=self.texts[i],
+            start=int(self.starts[i]),
+            end=int(self.ends[i])
+        )
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
 class DatasetLabeler:
     """Labels entities in resume text using ChatGPT API"""
     
@@ -63,13 +117,22 @@ Return JSON in this exact format:
     def __init__(self, model: str = "gpt-4o-mini"):
         config = ChatGPTConfig()
         self.model = model
-        self.client = AzureOpenAI(
+        # One shared keep-alive pool for all requests, so concurrent resumes
+        # reuse connections instead of paying a TLS handshake each. HTTP/2
+        # needs the optional h2 package (httpx[http2]), which openai does not pull in
+        self.http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=60,
+            limits=httpx.Limits(max_connections=128, max_keepalive_connections=64)
+        )
+        self.client = AsyncAzureOpenAI(
             api_key=config.AZURE_OPENAI_API_KEY,
             api_version="2024-12-01-preview",
-            azure_endpoint=config.AZURE_OPENAI_ENDPOINT
+            azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
+            http_client=self.http_client
         )
         
-    def extract_entities(self, text: str, max_retries: int = 3) -> List[Entity]:
+    async def extract_entities(self, text: str, max_retries: int = 3) -> EntitySpans:
         """
         Extract entities from text using ChatGPT API
         
@@ -78,16 +141,16 @@ Return JSON in this exact format:
             max_retries: Maximum number of retry attempts
             
         Returns:
-            List of Entity objects with type, text, and positions
+            EntitySpans with types, texts, and positions
         """
         if not text or not text.strip():
-            return []
+            return EntitySpans.empty()
         
         user_message = f"Extract all entities from this resume text:\n\n{text}"
         
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=[
                         {"role": "system", "content": self.SYSTEM_PROMPT},
@@ -101,111 +164,113 @@ Return JSON in this exact format:
                 
                 # Parse JSON response
                 cleaned_answer = answer.strip()
+                # Plain JSON answers skip the regexes entirely
                 if cleaned_answer.startswith("```"):
-                    cleaned_answer = re.sub(r'^```(?:json)?\n?', '', cleaned_answer)
-                    cleaned_answer = re.sub(r'\n?```$', '', cleaned_answer)
+                    cleaned_answer = _FENCE_CLOSE.sub('', _FENCE_OPEN.sub('', cleaned_answer))
                 
-                data = json.loads(cleaned_answer)
+                data = orjson.loads(cleaned_answer)
                 
-                # Convert to Entity objects and find positions in text
-                entities = []
-                
-                for entity_type, entity_texts in data.items():
-                    if not isinstance(entity_texts, list):
-                        continue
-                    
-                    for entity_text in entity_texts:
-                        # Find all occurrences of this entity in the text
-                        found_positions = self._find_entity_positions(text, entity_text)
-                        
-                        for start, end in found_positions:
-                            entities.append(Entity(
-                                type=entity_type,
-                                text=entity_text,
-                                start=start,
-                                end=end
-                            ))
-                
-                return entities
+                # Find entity positions in text
+                return self._find_entities(text, data)
                 
             except RateLimitError:
                 wait_time = (attempt + 1) * 10
                 print(f"Rate limit hit. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 print(f"JSON parse error (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt == max_retries - 1:
                     print(f"Raw response: {answer[:500]}")
-                    return []
-                time.sleep(2)
+                    return EntitySpans.empty()
+                await asyncio.sleep(2)
                 
             except BadRequestError as e:
                 print(f"Bad request error: {e}")
-                return []
+                return EntitySpans.empty()
                 
             except Exception as e:
                 print(f"Unexpected error (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt == max_retries - 1:
-                    return []
-                time.sleep(2)
+                    return EntitySpans.empty()
+                await asyncio.sleep(2)
         
-        return []
+        return EntitySpans.empty()
     
-    def _find_entity_positions(self, text: str, entity_text: str) -> List[Tuple[int, int]]:
+    def _find_entities(self, text: str, data: Dict[str, List[str]]) -> EntitySpans:
         """
-        Find all occurrences of entity_text in text and return their positions
+        Find all occurrences of every entity string in a single Aho-Corasick pass
         
         Args:
             text: The full text to search in
-            entity_text: The entity text to find
+            data: Parsed API response, entity type -> list of entity texts
             
         Returns:
-            List of (start, end) position tuples
+            EntitySpans (overlapping occurrences included)
         """
-        positions = []
-        search_text = entity_text.strip()
+        type_names: List[str] = []
+        # The same string may be listed under several types (or repeated)
+        types_by_text: Dict[str, List[int]] = {}
+        
+        for entity_type, entity_texts in data.items():
+            if not isinstance(entity_texts, list):
+                continue
+            
+            type_id = len(type_names)
+            type_names.append(entity_type)
+            
+            for entity_text in entity_texts:
+                search_text = entity_text.strip() if isinstance(entity_text, str) else ""
+                if not search_text:
+                    continue
+                
+                type_ids = types_by_text.setdefault(search_text, [])
+                if type_id not in type_ids:
+                    type_ids.append(type_id)
         
-        if not search_text:
-            return positions
+        if not types_by_text:
+            return EntitySpans.empty()
         
-        # Find all occurrences
-        start_pos = 0
-        while True:
-            pos = text.find(search_text, start_pos)
-            if pos == -1:
-                break
-            positions.append((pos, pos + len(search_text)))
-            start_pos = pos + 1  # Move past this occurrence to find next
+        automaton = ahocorasick.Automaton()
+        for search_text, types in types_by_text.items():
+            automaton.add_word(search_text, (search_text, types))
+        automaton.make_automaton()
         
-        return positions
+        type_ids, starts, ends, texts = [], [], [], []
+        for end_idx, (search_text, found_type_ids) in automaton.iter(text):
+            for type_id in found_type_ids:
+                type_ids.append(type_id)
+                starts.append(end_idx - len(search_text) + 1)
+                ends.append(end_idx + 1)
+                texts.append(search_text)
+        
+        return EntitySpans(
+            type_names=type_names,
+            type_ids=np.array(type_ids, dtype=np.int8),
+            starts=np.array(starts, dtype=np.int32),
+            ends=np.array(ends, dtype=np.int32),
+            texts=texts
+        )
     
-    def entities_to_conll(self, text: str, entities: List[Entity]) -> List[Tuple[str, str]]:
+    def entities_to_conll(self, text: str, entities: EntitySpans) -> List[Tuple[str, str]]:
         """
         Convert text and entities to CoNLL format (token, tag)
         Uses BIO tagging: B- (Begin), I- (Inside), O (Outside)
         
         Args:
             text: Original text
-            entities: List of entities with positions
+            entities: Entity spans with positions
             
         Returns:
             List of (token, tag) tuples
         """
         # Tokenize text (simple whitespace tokenization)
-        tokens = []
-        
-        # Split by whitespace but keep track of positions
-        for match in re.finditer(r'\S+', text):
-            token = match.group()
-            start = match.start()
-            end = match.end()
-            tokens.append({
-                'text': token,
-                'start': start,
-                'end': end,
-                'tag': 'O'
-            })
+        # Tokens come out in text order, so both position arrays are sorted
+        matches = list(_TOKEN_PATTERN.finditer(text))
+        token_texts = [match.group() for match in matches]
+        starts = np.fromiter((match.start() for match in matches), dtype=np.int32, count=len(matches))
+        ends = np.fromiter((match.end() for match in matches), dtype=np.int32, count=len(matches))
+        tags = np.full(len(matches), 'O', dtype=object)
         
         # Map entity types to tag prefixes
         entity_type_map = {
@@ -216,46 +281,50 @@ Return JSON in this exact format:
             'LOCATIONS': 'LOC'
         }
         
-        # Sort entities by start position to process in order
-        sorted_entities = sorted(entities, key=lambda e: e.start)
+        # Sort entities by start position to process in order, dropping unknown types
+        known_type = np.array([t in entity_type_map for t in entities.type_names], dtype=bool)
+        prefix_by_type = np.array([entity_type_map.get(t, 'O') for t in entities.type_names], dtype=object)
         
-        # Assign tags based on entity positions
-        for entity in sorted_entities:
-            tag_prefix = entity_type_map.get(entity.type, 'O')
-            if tag_prefix == 'O':
-                continue
+        # Ties go by type in response order, so later types win overlaps as before
+        order = np.lexsort((entities.type_ids, entities.starts))
+        order = order[known_type[entities.type_ids[order]]]
+        
+        if len(order) and len(matches):
+            entity_starts = entities.starts[order]
+            entity_ends = entities.ends[order]
+            prefixes = prefix_by_type[entities.type_ids[order]]
             
-            # Find tokens that belong to this entity
-            entity_tokens = []
+            # Tokens in [lo:hi) are exactly those overlapping each entity
+            lo = np.searchsorted(ends, entity_starts, side='right')
+            hi = np.searchsorted(starts, entity_ends, side='left')
             
-            for i, token in enumerate(tokens):
-                token_start = token['start']
-                token_end = token['end']
-                
-                # Calculate overlap
-                overlap_start = max(token_start, entity.start)
-                overlap_end = min(token_end, entity.end)
-                overlap_length = max(0, overlap_end - overlap_start)
-                
-                # Token belongs to entity if:
-                # 1. Token is completely inside entity, OR
-                # 2. Significant overlap (>50% of token length)
-                token_length = token_end - token_start
-                
-                if overlap_length > 0:
-                    # Check if majority of token overlaps with entity
-                    if (token_start >= entity.start and token_end <= entity.end) or \
-                       (overlap_length >= token_length * 0.5):
-                        entity_tokens.append(i)
+            # Only the edge tokens can overlap partially, inner ones are fully inside.
+            # Token belongs to entity if:
+            # 1. Token is completely inside entity, OR
+            # 2. Significant overlap (>50% of token length)
+            def belongs(token_idx):
+                token_idx = np.clip(token_idx, 0, len(matches) - 1)
+                token_starts = starts[token_idx]
+                token_ends = ends[token_idx]
+                overlap_length = np.minimum(token_ends, entity_ends) - np.maximum(token_starts, entity_starts)
+                inside = (token_starts >= entity_starts) & (token_ends <= entity_ends)
+                return inside | (overlap_length >= (token_ends - token_starts) * 0.5)
+            
+            first = np.where(belongs(lo), lo, lo + 1)
+            last = np.where(belongs(hi - 1), hi - 1, hi - 2)
+            
+            # Later entities overwrite earlier ones, as with sequential tagging
+            owner = np.full(len(matches), -1, dtype=np.int32)
+            for k in np.flatnonzero(first <= last):
+                owner[first[k]:last[k] + 1] = k
             
-            # Tag the tokens
-            for idx, token_idx in enumerate(entity_tokens):
-                if idx == 0:
-                    tokens[token_idx]['tag'] = f'B-{tag_prefix}'
-                else:
-                    tokens[token_idx]['tag'] = f'I-{tag_prefix}'
+            # Tag the tokens: B- on the first token of the owning entity, I- after it
+            owned = np.flatnonzero(owner >= 0)
+            owner_ids = owner[owned]
+            bio = np.where(owned == first[owner_ids], 'B-', 'I-').astype(object)
+            tags[owned] = bio + prefixes[owner_ids]
         
-        return [(token['text'], token['tag']) for token in tokens]
+        return list(zip(token_texts, tags.tolist()))
     
     def format_conll_output(self, token_tag_pairs: List[Tuple[str, str]]) -> str:
         """Format token-tag pairs as CoNLL format string"""
@@ -263,52 +332,137 @@ Return JSON in this exact format:
         return '\n'.join(lines)
 
 
-def load_resumes(file_path: str) -> List[str]:
-    """Load resumes from file (split by double newlines)"""
+def iter_resumes(file_path: str) -> Iterator[str]:
+    """
+    Stream resumes from file (separated by blank lines)
+    
+    Reads line by line, so memory stays constant regardless of the file size.
+    """
+    buf = []
     with open(file_path, 'r', encoding='utf-8') as f:
-        text = f.read()
+        for line in f:
+            # Only an empty line separates resumes, whitespace-only lines belong to the text
+            if line != '\n':
+                buf.append(line)
+                continue
+            
+            resume = ''.join(buf).strip()
+            buf.clear()
+            if resume:
+                yield resume
     
-    resumes = [r.strip() for r in text.split('\n\n') if r.strip()]
-    return resumes
+    resume = ''.join(buf).strip()
+    if resume:
+        yield resume
 
 
-def save_progress(output_path: str, labeled_data: List[str]):
-    """Save labeled data to output file"""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(labeled_data))
+def load_resumes(file_path: str) -> List[str]:
+    """Load all resumes from file (separated by blank lines)"""
+    return list(iter_resumes(file_path))
 
 
-def load_checkpoint(checkpoint_path: str) -> int:
+def save_progress(output_path: str, labeled_data: List[str], last_idx: int) -> int:
+    """
+    Append labeled data added since the previous save to output file
+    
+    Args:
+        output_path: Output CoNLL file
+        labeled_data: All labeled resumes so far
+        last_idx: Number of items already written (0 starts a new file)
+        
+    Returns:
+        New number of written items, pass it to the next call
+    """
+    new_items = labeled_data[last_idx:]
+    if not new_items:
+        return last_idx
+    
+    # Only the tail is written, so total bytes written stay linear in the dataset size
+    with open(output_path, 'ab' if last_idx else 'wb') as f:
+        for idx, item in enumerate(new_items, start=last_idx):
+            f.write((item if idx == 0 else '\n\n' + item).encode('utf-8'))
+    
+    return len(labeled_data)
+
+
+def open_checkpoint(checkpoint_path: str, legacy_path: Optional[str] = None) -> mmap.mmap:
+    """
+    Open the checkpoint file as a writable memory map, creating it if needed
+    
+    A new file is zero-filled, so it reads back as index 0. If it does not exist
+    yet but a legacy text checkpoint does, the new file is seeded from it, so an
+    interrupted run resumes instead of starting over and truncating the output.
+    """
+    is_new = not os.path.exists(checkpoint_path)
+    
+    fd = os.open(checkpoint_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size < CHECKPOINT_SIZE:
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(fd, 0, CHECKPOINT_SIZE)
+            else:
+                os.ftruncate(fd, CHECKPOINT_SIZE)
+        # The mapping keeps its own reference to the file
+        checkpoint = mmap.mmap(fd, CHECKPOINT_SIZE)
+    finally:
+        os.close(fd)
+    
+    if is_new and legacy_path and os.path.exists(legacy_path):
+        with open(legacy_path, 'r') as f:
+            save_checkpoint(checkpoint, int(f.read().strip()))
+        # Persist the migrated value before dropping the old file
+        checkpoint.flush()
+        os.remove(legacy_path)
+    
+    return checkpoint
+
+
+def load_checkpoint(checkpoint: mmap.mmap) -> int:
     """Load the last processed resume index from checkpoint"""
-    if os.path.exists(checkpoint_path):
-        with open(checkpoint_path, 'r') as f:
-            return int(f.read().strip())
-    return 0
+    return int.from_bytes(checkpoint[:8], 'little')
 
 
-def save_checkpoint(checkpoint_path: str, index: int):
-    """Save current progress to checkpoint"""
-    with open(checkpoint_path, 'w') as f:
-        f.write(str(index))
+def save_checkpoint(checkpoint: mmap.mmap, index: int):
+    """
+    Save current progress to checkpoint
+    
+    Writes go to the shared page cache: they survive a process crash and are
+    flushed to disk by the OS, so there is no open/write/close per save.
+    """
+    checkpoint[:8] = index.to_bytes(8, 'little')
+
 
+async def label_resume(labeler: DatasetLabeler, semaphore: asyncio.Semaphore, resume: str) -> str:
+    """Label a single resume and return it in CoNLL format"""
+    async with semaphore:
+        # Extract entities
+        entities = await labeler.extract_entities(resume)
+        
+        # Small delay to avoid rate limits
+        await asyncio.sleep(0.5)
+    
+    # Convert to CoNLL format
+    token_tag_pairs = labeler.entities_to_conll(resume, entities)
+    return labeler.format_conll_output(token_tag_pairs)
 
-def main():
+
+async def main():
     """Main labeling pipeline"""
     
     # Configuration
     INPUT_FILE = "datasets/dataset_labeling.txt"
     OUTPUT_FILE = "XML_Roberta_neural_network_Anonimizator_finetune/dataset_labeled.conll"
-    CHECKPOINT_FILE = "XML_Roberta_neural_network_Anonimizator_finetune/labeling_checkpoint.txt"
+    CHECKPOINT_FILE = "XML_Roberta_neural_network_Anonimizator_finetune/labeling_checkpoint.bin"
+    LEGACY_CHECKPOINT_FILE = "XML_Roberta_neural_network_Anonimizator_finetune/labeling_checkpoint.txt"
     SAVE_INTERVAL = 10  # Save progress every N resumes
+    CONCURRENCY = 20  # Parallel API requests, tune to the Azure RPM/TPM limits
     
     print("=" * 60)
     print("DATASET ENTITY LABELER")
     print("=" * 60)
     
-    # Load resumes
-    print(f"\n📂 Loading resumes from: {INPUT_FILE}")
-    resumes = load_resumes(INPUT_FILE)
-    print(f"✅ Loaded {len(resumes)} resumes")
+    # Resumes are streamed from the input file, not loaded up front
+    print(f"\n📂 Streaming resumes from: {INPUT_FILE}")
     
     # Initialize labeler
     print("\n🤖 Initializing ChatGPT API...")
@@ -316,7 +470,8 @@ def main():
     print("✅ API initialized")
     
     # Load checkpoint
-    start_index = load_checkpoint(CHECKPOINT_FILE)
+    checkpoint = open_checkpoint(CHECKPOINT_FILE, LEGACY_CHECKPOINT_FILE)
+    start_index = load_checkpoint(checkpoint)
     if start_index > 0:
         print(f"\n🔄 Resuming from resume #{start_index}")
     
@@ -328,52 +483,72 @@ def main():
             labeled_data = [r.strip() for r in existing_text.split('\n\n') if r.strip()]
         print(f"✅ Loaded {len(labeled_data)} existing labeled resumes")
     
+    # Everything loaded is already on disk
+    last_written = len(labeled_data)
+    
     # Process resumes
-    print(f"\n🏃 Processing resumes {start_index + 1} to {len(resumes)}...")
+    print(f"\n🏃 Processing resumes from #{start_index + 1}...")
     print("-" * 60)
     
     failed_resumes = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    progress = tqdm(desc="Labeling")
     
-    for i in tqdm(range(start_index, len(resumes)), desc="Labeling"):
-        resume = resumes[i]
+    # Requests finish out of order; results are appended (and checkpointed)
+    # only as a contiguous prefix, so the output keeps the input order
+    finished: Dict[int, str] = {}
+    next_index = start_index
+    
+    async def worker(i: int, resume: str):
+        nonlocal next_index, last_written
         
         try:
-            # Extract entities
-            entities = labeler.extract_entities(resume)
-            
-            # Convert to CoNLL format
-            token_tag_pairs = labeler.entities_to_conll(resume, entities)
-            conll_output = labeler.format_conll_output(token_tag_pairs)
-            
-            # Add to labeled data
-            labeled_data.append(conll_output)
-            
-            # Save progress periodically
-            if (i + 1) % SAVE_INTERVAL == 0:
-                save_progress(OUTPUT_FILE, labeled_data)
-                save_checkpoint(CHECKPOINT_FILE, i + 1)
-            
-            # Small delay to avoid rate limits
-            time.sleep(0.5)
-            
+            finished[i] = await label_resume(labeler, semaphore, resume)
         except Exception as e:
             print(f"\n❌ Error processing resume #{i}: {e}")
             failed_resumes.append(i)
             # Save a placeholder for failed resume
-            labeled_data.append(f"# ERROR: Resume {i} failed to process\n")
-            continue
+            finished[i] = f"# ERROR: Resume {i} failed to process\n"
+        progress.update(1)
+        
+        while next_index in finished:
+            # Add to labeled data
+            labeled_data.append(finished.pop(next_index))
+            next_index += 1
+            
+            # Save progress periodically
+            if next_index % SAVE_INTERVAL == 0:
+                last_written = save_progress(OUTPUT_FILE, labeled_data, last_written)
+                save_checkpoint(checkpoint, next_index)
+    
+    # Only a bounded window of resumes is in flight, the rest stay unread in the file
+    pending = set()
+    resumes = islice(iter_resumes(INPUT_FILE), start_index, None)
+    for i, resume in enumerate(resumes, start=start_index):
+        if len(pending) >= 2 * CONCURRENCY:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        pending.add(asyncio.create_task(worker(i, resume)))
+    
+    if pending:
+        await asyncio.gather(*pending)
+    progress.close()
+    await labeler.http_client.aclose()
+    failed_resumes.sort()
+    total_resumes = next_index
     
     # Final save
     print("\n\n💾 Saving final results...")
-    save_progress(OUTPUT_FILE, labeled_data)
-    save_checkpoint(CHECKPOINT_FILE, len(resumes))
+    save_progress(OUTPUT_FILE, labeled_data, last_written)
+    save_checkpoint(checkpoint, total_resumes)
+    checkpoint.flush()
+    checkpoint.close()
     
     # Summary
     print("\n" + "=" * 60)
     print("✅ LABELING COMPLETE")
     print("=" * 60)
-    print(f"Total resumes: {len(resumes)}")
-    print(f"Successfully labeled: {len(resumes) - len(failed_resumes)}")
+    print(f"Total resumes: {total_resumes}")
+    print(f"Successfully labeled: {total_resumes - len(failed_resumes)}")
     print(f"Failed: {len(failed_resumes)}")
     print(f"\nOutput saved to: {OUTPUT_FILE}")
     
@@ -390,4 +565,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
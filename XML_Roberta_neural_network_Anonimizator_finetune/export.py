@@ -0,0 +1,26 @@
+"""
+Экспорт обученной NER модели в ONNX (для инференса через ONNX Runtime)
+"""
+
+from optimum.onnxruntime import ORTModelForTokenClassification
+from transformers import AutoTokenizer
+
+
+def export_onnx(model_path: str, output_dir: str):
+    """Экспортирует модель в <output_dir>/model.onnx вместе с конфигом и токенайзером"""
+    print(f"📦 Экспорт модели {model_path} в ONNX...")
+
+    model = ORTModelForTokenClassification.from_pretrained(model_path, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(output_dir)
+
+    print(f"✅ ONNX модель сохранена: {output_dir}")
+
+
+if __name__ == "__main__":
+
+    # Путь к обученной модели и куда положить ONNX
+    MODEL_PATH = "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output"
+    ONNX_DIR = "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output/onnx"
+
+    export_onnx(MODEL_PATH, ONNX_DIR)
@@ -1,12 +1,32 @@
+import os
+
 import torch
-from transformers import AutoModelForTokenClassification, AutoTokenizer
+from safetensors import safe_open
+from transformers import AutoConfig, AutoModelForTokenClassification, AutoTokenizer
+
+# Fused attention через torch.nn.functional.scaled_dot_product_attention (Flash/mem-efficient ядра)
+ATTN_IMPLEMENTATION = "sdpa"
+
+
+def _from_pretrained(path, **kwargs):
+    """
+    from_pretrained с SDPA-вниманием; если эта версия transformers не поддерживает
+    SDPA для XLM-R (ValueError), загружаем с обычным eager-вниманием.
+    """
+    try:
+        return AutoModelForTokenClassification.from_pretrained(
+            path, attn_implementation=ATTN_IMPLEMENTATION, **kwargs
+        )
+    except (ValueError, ImportError) as e:
+        print(f"⚠️ attn_implementation={ATTN_IMPLEMENTATION} недоступен ({e}), используем eager")
+        return AutoModelForTokenClassification.from_pretrained(path, attn_implementation="eager", **kwargs)
 
 
 def get_base_model(model_name, label2id):
     """Загружает чистую модель с нуля."""
     print(f"🆕 Загрузка базовой модели: {model_name}")
     id2label = {v: k for k, v in label2id.items()}
-    model = AutoModelForTokenClassification.from_pretrained(
+    model = _from_pretrained(
         model_name,
         num_labels=len(label2id),
         id2label=id2label,
@@ -19,11 +39,28 @@ def get_base_model(model_name, label2id):
 def load_existing_model(model_path):
     """Загружает уже обученную модель."""
     print(f"🔄 Загрузка существующей модели: {model_path}")
-    model = AutoModelForTokenClassification.from_pretrained(model_path)
+    model = _from_pretrained(model_path)
     tokenizer = AutoTokenizer.from_pretrained(model_path)
     return model, tokenizer
 
 
+def load_classifier_weights(model_path):
+    """
+    Читает из чекпоинта только веса головы (classifier.weight, classifier.bias),
+    не загружая энкодер. safetensors отдаёт тензоры через mmap.
+    """
+    safetensors_path = os.path.join(model_path, "model.safetensors")
+    if os.path.exists(safetensors_path):
+        with safe_open(safetensors_path, framework="pt", device="cpu") as f:
+            return f.get_tensor("classifier.weight"), f.get_tensor("classifier.bias")
+
+    # Старый формат (pytorch_model.bin) — читаем state_dict без создания модели
+    state_dict = torch.load(
+        os.path.join(model_path, "pytorch_model.bin"), map_location="cpu", mmap=True, weights_only=True
+    )
+    return state_dict["classifier.weight"], state_dict["classifier.bias"]
+
+
 def extend_model(model_path, new_label2id):
     """
     Расширяет существующую модель новыми классами.
@@ -31,14 +68,14 @@ def extend_model(model_path, new_label2id):
     """
     print(f"🔧 Расширение модели {model_path}...")
 
-    # 1. Загружаем старую модель
-    old_model = AutoModelForTokenClassification.from_pretrained(model_path)
+    # 1. От старой модели нужны только метки и веса головы
+    old_label2id = AutoConfig.from_pretrained(model_path).label2id
+    old_weight, old_bias = load_classifier_weights(model_path)
     old_tokenizer = AutoTokenizer.from_pretrained(model_path)
-    old_label2id = old_model.config.label2id
 
     # 2. Создаем новую модель с новой конфигурацией
     new_id2label = {v: k for k, v in new_label2id.items()}
-    new_model = AutoModelForTokenClassification.from_pretrained(
+    new_model = _from_pretrained(
         model_path,
         num_labels=len(new_label2id),
         id2label=new_id2label,
@@ -48,12 +85,18 @@ def extend_model(model_path, new_label2id):
 
     # 3. Копируем веса (Smart Weights Transfer)
     print("   ⚖️ Перенос весов...")
+    # Индексы совпадающих классов в старой и новой голове
+    shared = [label for label in old_label2id if label in new_label2id]
+    old_ids = torch.tensor([old_label2id[label] for label in shared], dtype=torch.long)
+    new_ids = torch.tensor([new_label2id[label] for label in shared], dtype=torch.long)
+
+    # Чекпоинт мог быть сохранён в другом dtype
+    dtype = new_model.classifier.weight.dtype
+    old_weight, old_bias = old_weight.to(dtype), old_bias.to(dtype)
+
     with torch.no_grad():
-        for label, old_id in old_label2id.items():
-            if label in new_label2id:
-                new_id = new_label2id[label]
-                # Копируем классификатор (weights + bias)
-                new_model.classifier.weight[new_id] = old_model.classifier.weight[old_id]
-                new_model.classifier.bias[new_id] = old_model.classifier.bias[old_id]
+        # Копируем классификатор (weights + bias) одной операцией на тензор
+        new_model.classifier.weight.index_copy_(0, new_ids, old_weight.index_select(0, old_ids))
+        new_model.classifier.bias.index_copy_(0, new_ids, old_bias.index_select(0, old_ids))
 
     return new_model, old_tokenizer
\ No newline at end of file
@@ -2,83 +2,266 @@
 Тестирование обученной NER модели
 """
 
+import os
+from collections import defaultdict
+from functools import lru_cache
+
 from transformers import AutoModelForTokenClassification, AutoTokenizer
+import numpy as np
 import torch
+from numba import njit
 
 
-def load_model(model_path: str):
-    """Загружает модель и токенизатор"""
-    model = AutoModelForTokenClassification.from_pretrained(model_path)
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model.eval()
+def _attach_label_tables(model):
+    """
+    id -> метка одним массивом: декодер индексирует его numpy-ом, без dict на каждый токен.
+    Там же — целочисленные таблицы BIO-декодера (см. _bio_tables).
+    """
+    id2label = model.config.id2label
+    model._id2label_arr = np.array([id2label[i] for i in range(len(id2label))], dtype=object)
+    model._label_kinds, model._label_type_ids, model._type_names = _bio_tables(model._id2label_arr)
 
+
+def load_model(model_path: str, onnx_path: str | None = None):
+    """
+    Загружает модель и токенизатор.
+    Если указан onnx_path (папка из export.py) — модель работает через ONNX Runtime.
+    """
     # GPU если доступен
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
+
+    if onnx_path:
+        return _load_onnx_model(model_path, onnx_path, device)
+
+    # На GPU с поддержкой BF16 (Ampere+) веса в BF16 — вдвое меньше трафика и быстрее тензорные ядра
+    use_bf16 = device.type == "cuda" and torch.cuda.is_bf16_supported()
+    dtype = torch.bfloat16 if use_bf16 else torch.float32
+
+    model = AutoModelForTokenClassification.from_pretrained(model_path, torch_dtype=dtype)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.to(device).eval()
+
+    _attach_label_tables(model)
+
+    # TorchInductor фьюзит ядра; на старом PyTorch остаёмся в eager.
+    # Компиляция ленивая и падает на первом forward — прогреваем внутри try
+    try:
+        # dynamic=True без CUDA-графов: батч дополняется до своей длины, а reduce-overhead
+        # записывал бы отдельный граф (и пул памяти) на каждую длину
+        compiled = torch.compile(model, dynamic=True)
+        with torch.inference_mode():
+            # .cpu() синхронизирует поток: pinned-буферы _to_device можно переиспользовать
+            compiled(**_to_device(tokenizer(["warmup"], return_tensors="pt"), device)).logits.cpu()
+        model = compiled
+    except Exception as e:
+        print(f"⚠️ torch.compile недоступен: {e}")
 
     print(f"✅ Модель загружена: {model_path}")
-    print(f"   Device: {device}")
-    print(f"   Labels: {list(model.config.id2label.values())}")
+    print(f"   Device: {device} ({dtype})")
+    print(f"   Labels: {model._id2label_arr.tolist()}")
 
     return model, tokenizer, device
 
 
-def predict(text: str, model, tokenizer, device) -> list[dict]:
-    """Извлекает сущности из текста"""
+def _load_onnx_model(model_path: str, onnx_path: str, device: torch.device):
+    """ONNX Runtime: фьюзинг attention/MLP и константные свёртки графа; интерфейс как у HF модели"""
+    from optimum.onnxruntime import ORTModelForTokenClassification
+
+    provider = "CUDAExecutionProvider" if device.type == "cuda" else "CPUExecutionProvider"
+    # Явное имя файла: в той же папке экстрактор кладёт и INT8-версию (model.int8.onnx)
+    model = ORTModelForTokenClassification.from_pretrained(onnx_path, file_name="model.onnx", provider=provider)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    _attach_label_tables(model)
+
+    print(f"✅ ONNX модель загружена: {onnx_path}")
+    print(f"   Device: {device} ({provider})")
+    print(f"   Labels: {model._id2label_arr.tolist()}")
+
+    return model, tokenizer, device
+
+
+# Вид метки для декодера
+KIND_O, KIND_B, KIND_I = 0, 1, 2
+
+
+def _bio_tables(id2label_arr: np.ndarray):
+    """
+    Таблицы по id метки для декодера: вид метки (KIND_O/B/I), id типа сущности
+    (-1 для O) и список имён типов. Строятся один раз при загрузке модели.
+    """
+    labels = id2label_arr.tolist()
+    # Пустой тип ("B-") сущностью не считается
+    type_names = sorted({label[2:] for label in labels if label.startswith(("B-", "I-")) and label[2:]})
+    type_index = {name: i for i, name in enumerate(type_names)}
+
+    kinds = np.array(
+        [KIND_B if label.startswith("B-") else KIND_I if label.startswith("I-") else KIND_O for label in labels],
+        dtype=np.int8
+    )
+    type_ids = np.array([type_index.get(label[2:], -1) for label in labels], dtype=np.int8)
+    return kinds, type_ids, type_names
+
+
+@njit(cache=True)
+def _decode_bio(pred_ids, kinds, type_ids):
+    """
+    BIO-декодирование по id меток: автомат на двух целочисленных таблицах.
+    Возвращает (starts, ends, types) — границы сущностей [start, end) в токенах и id их типов.
+    """
+    n = pred_ids.shape[0]
+    starts = np.empty(n, dtype=np.int32)
+    ends = np.empty(n, dtype=np.int32)
+    types = np.empty(n, dtype=np.int32)
+    count = 0
+    current = -1
+    start = 0
+
+    for i in range(n):
+        p = pred_ids[i]
+        kind = kinds[p]
+        type_id = type_ids[p]
+        if kind == KIND_B:
+            # Сохраняем предыдущую сущность и начинаем новую
+            if current >= 0:
+                starts[count] = start
+                ends[count] = i
+                types[count] = current
+                count += 1
+            current = type_id
+            start = i
+        elif kind == KIND_I and current >= 0 and type_id == current:
+            # Продолжаем ТОЛЬКО если тип совпадает
+            continue
+        elif current >= 0:
+            # "O" или несовпадение типа
+            starts[count] = start
+            ends[count] = i
+            types[count] = current
+            count += 1
+            current = -1
+
+    # Последняя сущность
+    if current >= 0:
+        starts[count] = start
+        ends[count] = n
+        types[count] = current
+        count += 1
+
+    return starts[:count], ends[:count], types[:count]
+
+
+def _entities_from_predictions(tokens: list[str], pred_ids: np.ndarray, model, tokenizer) -> list[dict]:
+    """Собирает сущности из токенов одного текста и предсказанных id меток"""
+    # Служебные токены пропускаем
+    keep = [i for i, token in enumerate(tokens) if token not in ("<s>", "</s>", "<pad>")]
+    tokens = [tokens[i] for i in keep]
+    pred_ids = pred_ids[keep]
 
+    starts, ends, types = _decode_bio(pred_ids, model._label_kinds, model._label_type_ids)
+
+    # Строки собираются один раз на сущность
+    entities = []
+    for start, end, type_id in zip(starts.tolist(), ends.tolist(), types.tolist()):
+        text_value = tokenizer.convert_tokens_to_string(tokens[start:end]).strip()
+        if text_value:
+            entities.append({"type": model._type_names[type_id], "text": text_value})
+
+    return entities
+
+
+# Предвыделенные pinned-буферы для копирования входов на GPU (один раз на процесс)
+MAX_BATCH = 32
+MAX_LENGTH = 512
+_host_buffers = None
+
+
+def _to_device(inputs, device) -> dict:
+    """
+    Переносит входы на устройство. На GPU — через переиспользуемые pinned-буферы
+    и асинхронное копирование, без новых выделений памяти на каждый вызов.
+    """
+    global _host_buffers
+    if device.type != "cuda":
+        return {k: inputs[k].to(device) for k in ("input_ids", "attention_mask")}
+
+    if _host_buffers is None:
+        _host_buffers = {
+            # Плоский буфер: срез [:b * s].view(b, s) всегда непрерывный, иначе PyTorch
+            # перед копированием на GPU делает промежуточную копию в обычной памяти
+            k: torch.empty(MAX_BATCH * MAX_LENGTH, dtype=torch.long, pin_memory=True)
+            for k in ("input_ids", "attention_mask")
+        }
+
+    # Буфер можно перезаписывать: предыдущий батч уже синхронизирован через .cpu() результата
+    batch_size, seq_len = inputs["input_ids"].shape
+    on_device = {}
+    for k, buf in _host_buffers.items():
+        staged = buf[:batch_size * seq_len].view(batch_size, seq_len)
+        staged.copy_(inputs[k])
+        on_device[k] = staged.to(device, non_blocking=True)
+    return on_device
+
+
+def predict_batch(texts: list[str], model, tokenizer, device) -> list[list[dict]]:
+    """Извлекает сущности из нескольких текстов (прогоны по MAX_BATCH текстов)"""
+    results = []
+    for offset in range(0, len(texts), MAX_BATCH):
+        results.extend(_predict_chunk(texts[offset:offset + MAX_BATCH], model, tokenizer, torch.device(device)))
+    return results
+
+
+def _predict_chunk(texts: list[str], model, tokenizer, device) -> list[list[dict]]:
+    """Один прогон модели для не более чем MAX_BATCH текстов"""
+
+    # Паддинг до самого длинного текста в батче
     inputs = tokenizer(
-        text,
+        texts,
         return_tensors="pt",
+        padding=True,
         truncation=True,
-        max_length=512
+        max_length=MAX_LENGTH
     )
-    inputs = {k: v.to(device) for k, v in inputs.items()}
 
-    with torch.no_grad():
-        outputs = model(**inputs)
+    with torch.inference_mode():
+        outputs = model(**_to_device(inputs, device))
 
-    predictions = torch.argmax(outputs.logits, dim=2)
-    tokens = tokenizer.convert_ids_to_tokens(inputs["input_ids"][0])
-    labels = [model.config.id2label[p.item()] for p in predictions[0]]
+    predictions = outputs.logits.argmax(dim=-1).cpu().numpy()
+    # Входы остались на CPU — обратно с устройства их не копируем
+    input_ids = inputs["input_ids"].numpy()
+    attention_mask = inputs["attention_mask"].numpy().astype(bool)
 
-    entities = []
-    current_entity = None
-    current_tokens = []
+    results = []
+    for row in range(len(texts)):
+        mask = attention_mask[row]
+        tokens = tokenizer.convert_ids_to_tokens(input_ids[row][mask].tolist())
+        results.append(_entities_from_predictions(tokens, predictions[row][mask], model, tokenizer))
 
-    for token, label in zip(tokens, labels):
-        if token in ["<s>", "</s>", "<pad>"]:
-            continue
+    return results
 
-        if label.startswith("B-"):
-            # Сохраняем предыдущую сущность
-            if current_entity:
-                text_value = tokenizer.convert_tokens_to_string(current_tokens).strip()
-                if text_value:
-                    entities.append({"type": current_entity, "text": text_value})
 
-            # Начинаем новую
-            current_entity = label[2:]
-            current_tokens = [token]
+def predict(text: str, model, tokenizer, device) -> list[dict]:
+    """Извлекает сущности из текста"""
+    return predict_batch([text], model, tokenizer, device)[0]
 
-        elif label.startswith("I-") and current_entity == label[2:]:  # ← ИСПРАВЛЕНО
-            # Продолжаем ТОЛЬКО если тип совпадает
-            current_tokens.append(token)
 
-        else:  # "O" или несовпадение типа
-            if current_entity:
-                text_value = tokenizer.convert_tokens_to_string(current_tokens).strip()
-                if text_value:
-                    entities.append({"type": current_entity, "text": text_value})
-                current_entity = None
-                current_tokens = []
+def make_cached_predict(model, tokenizer, device, maxsize: int = 256):
+    """
+    predict с кэшем по тексту для одной загруженной модели.
+    Модель детерминирована на инференсе, поэтому повторный ввод не гоняется
+    через токенизатор и модель. После перезагрузки модели нужен новый кэш.
+    """
 
-    # Последняя сущность
-    if current_entity:
-        text_value = tokenizer.convert_tokens_to_string(current_tokens).strip()
-        if text_value:
-            entities.append({"type": current_entity, "text": text_value})
+    @lru_cache(maxsize=maxsize)
+    def _predict_cached(text: str) -> tuple:
+        # Кортеж — чтобы закэшированный результат нельзя было изменить снаружи
+        return tuple((e["type"], e["text"]) for e in predict(text, model, tokenizer, device))
 
-    return entities
+    def cached_predict(text: str) -> list[dict]:
+        return [{"type": t, "text": value} for t, value in _predict_cached(text)]
+
+    cached_predict.cache_clear = _predict_cached.cache_clear
+    return cached_predict
 
 
 def print_entities(entities: list[dict]):
@@ -88,12 +271,9 @@ def print_entities(entities: list[dict]):
         return
 
     # Группируем по типу
-    by_type = {}
+    by_type = defaultdict(list)
     for e in entities:
-        t = e["type"]
-        if t not in by_type:
-            by_type[t] = []
-        by_type[t].append(e["text"])
+        by_type[e["type"]].append(e["text"])
 
     for entity_type, values in sorted(by_type.items()):
         print(f"   {entity_type}: {', '.join(values)}")
@@ -107,9 +287,13 @@ if __name__ == "__main__":
 
     # Путь к обученной модели
     MODEL_PATH = "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output"
+    # ONNX-версия (python export.py); если её нет — PyTorch
+    ONNX_PATH = "XML_Roberta_neural_network_Anonimizator_finetune/ner_model_output/onnx"
 
     # Загружаем модель
-    model, tokenizer, device = load_model(MODEL_PATH)
+    model, tokenizer, device = load_model(MODEL_PATH, ONNX_PATH if os.path.isdir(ONNX_PATH) else None)
+    # Скрипт только для инференса — autograd не нужен нигде
+    torch.set_grad_enabled(False)
 
     # Тестовые примеры
     test_texts = [
@@ -126,17 +310,19 @@ if __name__ == "__main__":
     print("🧪 ТЕСТИРОВАНИЕ NER МОДЕЛИ")
     print("=" * 60)
 
-    for i, text in enumerate(test_texts, 1):
+    # Все тестовые тексты — одним батчем
+    batch_entities = predict_batch(test_texts, model, tokenizer, device)
+
+    for i, (text, entities) in enumerate(zip(test_texts, batch_entities), 1):
         print(f"\n📝 Текст {i}:")
         print(f"   {text[:80]}..." if len(text) > 80 else f"   {text}")
 
-        entities = predict(text, model, tokenizer, device)
-
         print(f"\n🏷️ Найденные сущности:")
         print_entities(entities)
         print("-" * 60)
 
     # Интерактивный режим
+    cached_predict = make_cached_predict(model, tokenizer, device)
     print("\n💬 Интерактивный режим (введите 'exit' для выхода):")
     while True:
         try:
@@ -146,7 +332,7 @@ if __name__ == "__main__":
             if not user_text:
                 continue
 
-            entities = predict(user_text, model, tokenizer, device)
+            entities = cached_predict(user_text)
             print("\n🏷️ Сущности:")
             print_entities(entities)
 
@@ -3,6 +3,7 @@ Test script for dataset labeler
 Tests the labeling pipeline on a few sample resumes
 """
 
+import asyncio
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -45,7 +46,7 @@ SKILLS
     
     # Extract entities
     print("\n🔍 Extracting entities...")
-    entities = labeler.extract_entities(sample_resume)
+    entities = asyncio.run(labeler.extract_entities(sample_resume))
     
     print(f"\n✅ Found {len(entities)} entities:")
     print("-" * 60)
@@ -1,56 +1,81 @@
 import numpy as np
+import torch
 from seqeval.metrics import classification_report, precision_score, recall_score, f1_score
 
 
 def align_labels_with_tokens(examples, tokenizer, max_len=512):
     """
     Выравнивает NER-теги с токенами (учитывает разбивку на подслова).
+
+    Работает над батчем (datasets.map(batched=True)): токенизатор вызывается
+    один раз на батч, метка ставится на первый подтокен каждого слова
+    через numpy-маску, остальные подтокены и спецтокены получают -100.
     """
     tokenized_inputs = tokenizer(
         examples["tokens"],
         truncation=True,
         is_split_into_words=True,
-        max_length=max_len
+        max_length=max_len,
+        padding=False,
+        return_tensors=None
     )
 
     labels = []
     for i, label in enumerate(examples["ner_tags"]):
-        word_ids = tokenized_inputs.word_ids(batch_index=i)
-        previous_word_idx = None
-        label_ids = []
+        # None (спецтокены) -> -1
+        word_ids = np.array(
+            [-1 if w is None else w for w in tokenized_inputs.word_ids(batch_index=i)],
+            dtype=np.int32
+        )
+        label_arr = np.asarray(label, dtype=np.int64)
 
-        for word_idx in word_ids:
-            if word_idx is None:
-                label_ids.append(-100)
-            elif word_idx != previous_word_idx:
-                label_ids.append(label[word_idx])
-            else:
-                label_ids.append(-100)
-            previous_word_idx = word_idx
+        # Первый подтокен слова: word_id отличается от предыдущего (перед первым — None)
+        previous = np.empty_like(word_ids)
+        previous[0] = -1
+        previous[1:] = word_ids[:-1]
+        mask = (word_ids != previous) & (word_ids != -1)
 
-        labels.append(label_ids)
+        label_ids = np.full(len(word_ids), -100, dtype=np.int64)
+        label_ids[mask] = label_arr[word_ids[mask]]
+        labels.append(label_ids.tolist())
 
     tokenized_inputs["labels"] = labels
     return tokenized_inputs
 
 
+def preprocess_logits_for_metrics(logits, labels):
+    """
+    Argmax по логитам прямо на GPU, до копирования на CPU.
+    На хост уходит компактный (N, L) массив id меток вместо (N, L, C) float32.
+    """
+    if isinstance(logits, tuple):
+        logits = logits[0]
+    # int16, а не int8: число меток здесь неизвестно и может быть > 127
+    return logits.argmax(dim=-1).to(torch.int16)
+
+
 def compute_metrics_factory(label_list):
     """
     Возвращает функцию метрик, "замкнутую" на список меток.
     """
+    label_arr = np.array(label_list)
+    # Меток единицы-десятки: хватает int8 (int16 на запас), а не int64 от argmax
+    pred_dtype = np.int8 if len(label_list) <= np.iinfo(np.int8).max else np.int16
 
     def compute_metrics(pred):
+        # Предсказания уже сведены argmax-ом в preprocess_logits_for_metrics
         predictions, labels = pred
-        predictions = np.argmax(predictions, axis=2)
+        predictions = predictions.astype(pred_dtype, copy=False)
+        # -100 тоже помещается в int16
+        labels = labels.astype(np.int16, copy=False)
 
-        true_preds = [
-            [label_list[p] for (p, l) in zip(prediction, label) if l != -100]
-            for prediction, label in zip(predictions, labels)
-        ]
-        true_labels = [
-            [label_list[l] for (p, l) in zip(prediction, label) if l != -100]
-            for prediction, label in zip(predictions, labels)
-        ]
+        # Маска -100 считается один раз на предложение, метки берутся numpy-индексацией
+        true_preds = []
+        true_labels = []
+        for prediction, label in zip(predictions, labels):
+            mask = label != -100
+            true_preds.append(label_arr[prediction[mask]].tolist())
+            true_labels.append(label_arr[label[mask]].tolist())
 
         return {
             "precision": precision_score(true_labels, true_preds),
@@ -58,4 +83,4 @@ def compute_metrics_factory(label_list):
             "f1": f1_score(true_labels, true_preds),
         }
 
-    return compute_metrics
\ No newline at end of file
+    return compute_metrics